@@ -0,0 +1,155 @@
+"""
+Shared fixtures for the benchmark suite. Run with
+    pytest benchmarks --benchmark-autosave
+and compare a later release against the saved run with
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Every benchmark records its peak traced memory (MiB) in extra_info, which is kept in the saved json next to the timings.
+Payloads are generated deterministically in small, medium and huge sizes. Responses recorded from the real APIs can be
+replayed instead by saving them as <name>.json in a directory and pointing lc_bench_fixtures at it.
+HTTP benchmarks talk to a local stand-in server, so no API keys or network access are needed.
+"""
+import json
+import os
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+# Rows of a single series / (dates, tickers) of a price panel / (symbols, bars) of a coinalyze history response
+SIZES = {
+    "small": {"rows": 365, "panel": (250, 5), "history": (2, 365)},
+    "medium": {"rows": 10_000, "panel": (2_500, 50), "history": (50, 1_000)},
+    "huge": {"rows": 500_000, "panel": (2_500, 500), "history": (300, 3_000)},
+}
+# Run a subset with e.g. lc_bench_sizes=small,medium
+ACTIVE_SIZES = [s for s in os.environ.get("lc_bench_sizes", ",".join(SIZES)).split(",") if s in SIZES]
+FIXTURE_DIR = os.environ.get("lc_bench_fixtures")
+START = 1_230_768_000  # 2009-01-01
+
+
+def recorded(name, generate):
+    """The recorded fixture name.json if there is one, else generate()"""
+    if FIXTURE_DIR:
+        path = Path(FIXTURE_DIR) / f"{name}.json"
+        if path.exists():
+            return json.loads(path.read_bytes())
+    return generate()
+
+
+def glassnode_rows(n, fields=None):
+    """Glassnode metric rows [{'t': ..., 'v': ...}], or [{'t': ..., 'o': {...}}] for object valued metrics"""
+    rng = np.random.default_rng(0)
+    t = (START + 600 * np.arange(n)).tolist()
+    if fields is None:
+        return [{"t": ti, "v": vi} for ti, vi in zip(t, rng.lognormal(size=n).tolist())]
+    values = {f: rng.normal(size=n).tolist() for f in fields}
+    return [{"t": ti, "o": {f: values[f][k] for f in fields}} for k, ti in enumerate(t)]
+
+
+def coinalyze_history(symbols, bars):
+    """Coinalyze history response, one record per symbol with minute bars"""
+    rng = np.random.default_rng(0)
+    t = (START + 60 * np.arange(bars)).tolist()
+    out = []
+    for k in range(symbols):
+        o, h, l, c, v = rng.lognormal(size=(5, bars)).tolist()
+        history = [{"t": ti, "o": a, "h": b, "l": d, "c": e, "v": f} for ti, a, b, d, e, f in zip(t, o, h, l, c, v)]
+        out.append({"symbol": f"SYM{k}USDT_PERP.A", "history": history})
+    return out
+
+
+def price_panel(dates, tickers):
+    """Wide DATE x TICKER frame of random walk prices"""
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2014-01-01", periods=dates, name="DATE")
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(dates, tickers)), axis=0))
+    return pd.DataFrame(prices, index=index, columns=pd.Index([f"T{k:03d}" for k in range(tickers)], name="TICKER"))
+
+
+def long_prices(dates, tickers):
+    """Long OHLCV rows as yahoo() concatenates them before pivoting"""
+    panel = price_panel(dates, tickers)
+    price = panel.stack().rename("CLOSE").reset_index()
+    for col in ["OPEN", "HIGH", "LOW"]:
+        price[col] = price["CLOSE"]
+    price["VOLUME"] = 1_000
+    return price
+
+
+@pytest.fixture(params=ACTIVE_SIZES)
+def size(request):
+    return request.param
+
+
+@pytest.fixture
+def bench(benchmark):
+    """benchmark(func, *args, **kwargs) that also records the peak traced memory of one call"""
+
+    def run(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mib"] = round(peak / 2**20, 3)
+        return benchmark(func, *args, **kwargs)
+
+    return run
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = self.server.routes.get(self.path.split("?")[0])
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer:
+    """Local stand-in for the data APIs serving fixed response bodies over keep-alive HTTP"""
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.routes = {}
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def add(self, path, payload):
+        """Serve payload (bytes or anything json serializable) at path and return its url"""
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.httpd.routes[path] = body
+        return self.url + path
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(scope="session")
+def server():
+    s = FixtureServer()
+    yield s
+    s.close()
@@ -0,0 +1,27 @@
+"""
+Post-processing of Coinalyze history responses: flattening of the per-symbol history records and timestamp conversion
+"""
+import pytest
+from conftest import SIZES, coinalyze_history, recorded
+
+from leavenworth import coinalyze
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+@pytest.mark.benchmark(group="coinalyze_to_df")
+def test_to_df_flatten(bench, size):
+    symbols, bars = SIZES[size]["history"]
+    data = recorded(f"coinalyze_history_{size}", lambda: coinalyze_history(symbols, bars))
+    df = bench(coinalyze.to_df, data, flatten=True)
+    assert len(df) == symbols * bars
+
+
+@pytest.mark.benchmark(group="coinalyze_stitch")
+def test_stitch(bench, size):
+    symbols, bars = SIZES[size]["history"]
+    data = recorded(f"coinalyze_history_{size}", lambda: coinalyze_history(symbols, bars))
+    df = bench(coinalyze._stitch, data)
+    assert len(df) == symbols * bars
@@ -0,0 +1,28 @@
+"""
+GlassnodeClient.get() end to end against the local stand-in server: request, download and parsing into a Series/DataFrame
+"""
+import pytest
+from conftest import SIZES, glassnode_rows, recorded
+
+from leavenworth.glassnode_api import GlassnodeClient
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+@pytest.mark.benchmark(group="glassnode_get")
+def test_get_series(bench, server, size):
+    n = SIZES[size]["rows"]
+    url = server.add(f"/v1/metrics/market/price_usd_close_{size}", recorded(f"glassnode_series_{size}", lambda: glassnode_rows(n)))
+    s = bench(GlassnodeClient().get, url)
+    assert len(s) == n
+
+
+@pytest.mark.benchmark(group="glassnode_get_object")
+def test_get_object(bench, server, size):
+    n = SIZES[size]["rows"]
+    fields = ["sth", "lth", "miners", "exchanges", "etfs"]
+    url = server.add(f"/v1/metrics/supply/distribution_{size}", recorded(f"glassnode_object_{size}", lambda: glassnode_rows(n, fields)))
+    df = bench(GlassnodeClient().get, url)
+    assert df.shape == (n, len(fields))
@@ -0,0 +1,56 @@
+"""
+Plot routines rendered to an in-memory png with the Agg backend
+"""
+import io
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+from conftest import SIZES, price_panel  # noqa: E402
+
+from leavenworth import plot  # noqa: E402
+from leavenworth.yahoo import prep_returns  # noqa: E402
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def _draw(func, *args, **kwargs):
+    f = func(*args, **kwargs)[0]
+    f.savefig(io.BytesIO(), format="png", dpi=50)
+    plt.close("all")
+
+
+def _series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2012-01-01", periods=n, freq="10min", name="t")
+    return pd.Series(np.exp(np.cumsum(rng.normal(0, 0.01, n))), index=index, name="v")
+
+
+@pytest.mark.benchmark(group="glassnode_plot")
+def test_glassnode_plot(bench, size):
+    n = SIZES[size]["rows"]
+    bench(_draw, plot.glassnode_plot, _series(n), price=_series(n, 1), title="BENCHMARK")
+
+
+@pytest.mark.benchmark(group="fng_plot")
+def test_fng_plot(bench, size):
+    n = min(SIZES[size]["rows"], 5_000)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"TIMESTAMP": pd.date_range("2018-02-01", periods=n, freq="D"), "VALUE": rng.integers(0, 100, n)})
+    bench(_draw, plot.fng_plot, df)
+
+
+@pytest.mark.benchmark(group="performance_plot")
+def test_performance_plot(bench, size):
+    dates, tickers = SIZES[size]["panel"]
+    r = prep_returns(price_panel(dates, min(tickers, 20)), period="month")
+    data = r.melt(id_vars=["DATE", "MONTH"], var_name="TICKER", value_name="RETURN").dropna()
+    data = data[data.DATE >= data.DATE.max() - pd.DateOffset(months=12)]
+    bench(_draw, plot.performance_plot, data, x="MONTH")
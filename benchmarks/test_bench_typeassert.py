@@ -0,0 +1,40 @@
+"""
+Per-call overhead of helpers.typeassert. Run with
+    pytest benchmarks/test_bench_typeassert.py
+"""
+import pytest
+
+from leavenworth import helpers
+from leavenworth.helpers import typeassert
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def _bare(symbols, interval="daily", period=None):
+    return symbols
+
+
+_checked = typeassert(symbols=str, interval=str, period=str)(_bare)
+
+
+def _loop(func, n=1000):
+    for _ in range(n):
+        func("BTCUSDT_PERP.A", "1min", period="1y")
+
+
+@pytest.mark.benchmark(group="typeassert")
+def test_bare(benchmark):
+    benchmark(_loop, _bare)
+
+
+@pytest.mark.benchmark(group="typeassert")
+def test_checked(benchmark):
+    benchmark(_loop, _checked)
+
+
+@pytest.mark.benchmark(group="typeassert")
+def test_checked_disabled(benchmark, monkeypatch):
+    monkeypatch.setattr(helpers, "typecheck", False)
+    benchmark(_loop, _checked)
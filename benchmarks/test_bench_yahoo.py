@@ -0,0 +1,34 @@
+"""
+Yahoo price handling: pivoting the long OHLCV rows into a DATE x TICKER frame and the return calculations on it
+"""
+import pytest
+from conftest import SIZES, long_prices, price_panel
+
+from leavenworth.yahoo import _pivot_close, daily_returns, prep_returns
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+@pytest.mark.benchmark(group="yahoo_pivot")
+def test_pivot_close(bench, size):
+    dates, tickers = SIZES[size]["panel"]
+    price = long_prices(dates, tickers)
+    df = bench(_pivot_close, price)
+    assert df.shape == (dates, tickers)
+
+
+@pytest.mark.benchmark(group="daily_returns")
+@pytest.mark.parametrize("method", ["mean", "std"])
+def test_daily_returns(bench, size, method):
+    df = price_panel(*SIZES[size]["panel"])
+    r = bench(daily_returns, df, period=60, method=method)
+    assert r.shape == df.shape
+
+
+@pytest.mark.benchmark(group="prep_returns")
+@pytest.mark.parametrize("period", ["day", "month", "inception"])
+def test_prep_returns(bench, size, period):
+    df = price_panel(*SIZES[size]["panel"])
+    bench(prep_returns, df, period=period)
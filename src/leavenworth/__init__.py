@@ -15,10 +15,119 @@ except PackageNotFoundError:  # pragma: no cover
 finally:
     del version, PackageNotFoundError
 
-from .glassnode import *
-from .plot import *
-from .vol import *
-from .yahoo import *
-from .fred import *
-from .fng import *
-from .coinalyze import *
+import importlib
+import types
+
+# Public names re-exported at package level, loaded on first access so that e.g.
+# `from leavenworth import oi` does not pull in the plotting stack or require API keys
+_lazy_attrs = {
+    "glassnode": ["glassnode", "glassnode_params", "glassnode_metric", "glassnode_many", "glassnode_panel"],
+    "plot": [
+        "lc_colors",
+        "lc_fonts",
+        "set_params",
+        "whiten_grid",
+        "stylize_spines",
+        "glassnode_plot",
+        "add_legend",
+        "fng_plot",
+        "change_width",
+        "performance_plot",
+        "batch_mode",
+        "render_batch",
+    ],
+    "derived": ["derive", "derived_params"],
+    "vol": ["bitvol"],
+    "yahoo": ["daily_returns", "yahoo", "yahoo_store", "prep_returns", "sp500"],
+    "returns": ["period_returns", "rolling_stat"],
+    "fred": ["fred_data", "fred_many", "fred_search", "fred_series_info"],
+    "fng": ["fng"],
+    "coinalyze": [
+        "intervals",
+        "get_unix_timestamps",
+        "get_unix_timestamps_from_period",
+        "chunk_window",
+        "batch_symbols",
+        "api_call",
+        "exchanges",
+        "supported_markets",
+        "current_funding_rate",
+        "predicted_funding_rate",
+        "oi",
+        "oi_history",
+        "funding_rate_history",
+        "predicted_funding_rate_history",
+        "liquidation_history",
+        "long_short_history",
+        "ohlcv_history",
+        "time_unit",
+        "to_df",
+        "filter_markets",
+        "filter_exchanges",
+        "merge_exchange",
+        "merge_markets",
+        "merge_meta",
+        "exchange_meta",
+        "market_meta",
+        "symbol_info",
+        "refresh_meta",
+        "gen_symbols",
+        "SnapshotPoller",
+    ],
+}
+_attr_module = {attr: module for module, attrs in _lazy_attrs.items() for attr in attrs}
+_submodules = [
+    "aio",
+    "cache",
+    "coinalyze",
+    "derived",
+    "fng",
+    "fred",
+    "glassnode",
+    "glassnode_api",
+    "helpers",
+    "plot",
+    "returns",
+    "transport",
+    "vol",
+    "yahoo",
+]
+
+__all__ = list(_attr_module)
+
+
+# glassnode, yahoo and fng are functions named like the module defining them. The package attribute is the function
+_entries = [name for name in _lazy_attrs if name in _attr_module]
+
+
+def _publish(module_name, module):
+    for attr in _lazy_attrs.get(module_name, []):
+        globals()[attr] = getattr(module, attr)
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # The import system binds every loaded submodule on the package. Export its public names along with it,
+        # and keep the module from replacing the function of the same name
+        if isinstance(value, types.ModuleType) and value.__name__ == f"{__name__}.{name}":
+            _publish(name, value)
+            if name in _entries:
+                return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name):
+    if name in _attr_module:
+        module = importlib.import_module("." + _attr_module[name], __name__)
+        _publish(_attr_module[name], module)
+        return getattr(module, name)
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_submodules))
@@ -0,0 +1,222 @@
+"""
+asyncio counterparts of the leavenworth data sources, built on one shared httpx.AsyncClient.
+They return the same DataFrame/Series shapes as the blocking functions. Typical usage:
+    from leavenworth import aio
+    mvrv, funding, vix = await asyncio.gather(aio.glassnode('MVRV'), aio.funding_rate_history(), aio.fred_data('VIXCLS'))
+    await aio.aclose()
+Timeouts, retries and pool sizes follow leavenworth.transport.settings. Coinalyze requests share coinalyze.rate_limiter with the blocking API,
+so mixing both stays within the per key limit. Requires httpx (pip install leavenworth[async])
+"""
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from . import transport, coinalyze
+from .fng import url as fng_url, _params as _fng_params, _frame as _fng_frame
+from .vol import ly_date, today, _request as _bitvol_request, _frame as _bitvol_frame
+from .helpers import check_request, glassnode_client, coinbase_endpoint, _coinbase_price, RateLimiter
+from .glassnode_api import parse
+from .fred import observations_url, _observations_params, _observations_series
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+_client = None
+_client_loop = None
+
+class AsyncRateLimiter:
+    """asyncio version of helpers.RateLimiter, at most `calls` acquisitions in any rolling window of `period` seconds. With shared = a helpers.RateLimiter the budget is shared with the blocking calls drawing from it"""
+
+    def __init__(self, calls = None, period = 60, shared = None):
+        self.limiter = shared if shared is not None else RateLimiter(calls, period)
+
+    @property
+    def calls(self):
+        return self.limiter.calls
+
+    @property
+    def period(self):
+        return self.limiter.period
+
+    async def acquire(self):
+        # The blocking limiter's lock is only held to read the window, so it is safe to take on the event loop
+        while True:
+            wait = self.limiter.try_acquire()
+            if wait is None:
+                return None
+            await asyncio.sleep(wait)
+
+# One budget per API key: async Coinalyze calls count against the same 40/min window as the blocking fan-out
+coinalyze_limiter = AsyncRateLimiter(shared = coinalyze.rate_limiter)
+
+def client():
+    """This routine returns the shared httpx.AsyncClient of the running event loop"""
+    global _client, _client_loop
+    if httpx is None:
+        raise Exception('httpx is required for the asyncio API, install it with pip install leavenworth[async]')
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        if _client is not None and not _client.is_closed:
+            _discard(_client, _client_loop, loop)
+        settings = transport.settings
+        connect, read = settings['timeout'] if isinstance(settings['timeout'], tuple) else (settings['timeout'],)*2
+        _client = httpx.AsyncClient(
+            timeout = httpx.Timeout(read, connect = connect),
+            limits = httpx.Limits(max_connections = settings['pool_connections']*settings['pool_maxsize'], max_keepalive_connections = settings['pool_maxsize']),
+            headers = {'Accept-Encoding': 'gzip, deflate'},
+        )
+        _client_loop = loop
+    return _client
+
+def _discard(old, old_loop, loop):
+    """Close the client of a previous event loop, on that loop while it still runs (other thread) or else from the current one"""
+    if old_loop.is_running():
+        asyncio.run_coroutine_threadsafe(old.aclose(), old_loop)
+    else:
+        loop.create_task(_close(old))
+    return None
+
+async def _close(c):
+    try:
+        await c.aclose()
+    except RuntimeError:
+        # Connections opened on an event loop that has since been closed can not be shut down cleanly, they are dropped with the pool
+        pass
+
+async def aclose():
+    """Close the shared client, e.g. on service shutdown"""
+    global _client
+    if _client is not None:
+        await _close(_client)
+        _client = None
+    return None
+
+def _retry_after(r):
+    value = r.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+async def get(url, params = None, headers = None):
+    """GET url through the shared client, retrying 429/5xx responses and connection errors with exponential backoff and honoring Retry-After"""
+    settings = transport.settings
+    if params:
+        params = {k: v for k, v in params.items() if v is not None}
+    for attempt in range(settings['retries'] + 1):
+        last = attempt == settings['retries']
+        backoff = settings['backoff_factor']*2**attempt
+        try:
+            r = await client().get(url, params = params, headers = headers)
+        except httpx.TransportError:
+            if last:
+                raise
+            await asyncio.sleep(backoff)
+            continue
+        if last or r.status_code not in settings['status_forcelist']:
+            return r
+        wait = _retry_after(r)
+        await asyncio.sleep(backoff if wait is None else wait)
+
+# Glassnode
+
+async def glassnode(metric, currency = 'BTC', debug = False, post_process = True, dtype = 'float64', resolution = '24h', since = None, until = None):
+    """asyncio version of leavenworth.glassnode()"""
+    currency = currency.upper()
+    info = check_request(metric.upper(), currency, resolution, debug = debug)
+    r = await get(info.url, params = glassnode_client().params(a = currency, i = resolution, s = since, u = until))
+    if r.is_error:
+        print('%s Error for url %s'%(r.status_code, info.url))
+        print(r.text)
+    return parse(r.content, info.url, debug = debug, post_process = post_process, dtype = dtype)
+
+# Coinalyze
+
+async def api_call(endpoint, params = None):
+    """asyncio version of coinalyze.api_call(), rate limited like the blocking fan-out"""
+    await coinalyze_limiter.acquire()
+    r = await get(coinalyze.base_url + endpoint, params = params, headers = coinalyze._headers())
+    return coinalyze._check(r)
+
+async def _fan_out(endpoint, params):
+    semaphore = asyncio.Semaphore(coinalyze.fan_out_workers)
+
+    async def call(p):
+        async with semaphore:
+            return await api_call(endpoint, params = p)
+
+    results = await asyncio.gather(*[call(p) for p in params])
+    return [record for data in results for record in data]
+
+async def _snapshot(endpoint, symbols):
+    params = [{'symbols': batch} for batch in coinalyze.batch_symbols(symbols)]
+    return coinalyze.to_df(await _fan_out(endpoint, params))
+
+async def _history(endpoint, symbols, interval, period, start_date, end_date):
+    params = coinalyze._history_params(symbols, interval, period, start_date, end_date)
+    return coinalyze._stitch(await _fan_out(endpoint, params))
+
+async def current_funding_rate(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0'):
+    """asyncio version of coinalyze.current_funding_rate()"""
+    return await _snapshot("/funding-rate", symbols)
+
+async def predicted_funding_rate(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0'):
+    """asyncio version of coinalyze.predicted_funding_rate()"""
+    return await _snapshot("/predicted-funding-rate", symbols)
+
+async def oi(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0'):
+    """asyncio version of coinalyze.oi()"""
+    return await _snapshot("/open-interest", symbols)
+
+async def oi_history(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0', interval = 'daily', period = None, start_date = None, end_date = None):
+    """asyncio version of coinalyze.oi_history()"""
+    return await _history("/open-interest-history", symbols, interval, period, start_date, end_date)
+
+async def funding_rate_history(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0', interval = 'daily', period = None, start_date = None, end_date = None):
+    """asyncio version of coinalyze.funding_rate_history()"""
+    return await _history("/funding-rate-history", symbols, interval, period, start_date, end_date)
+
+async def predicted_funding_rate_history(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0', interval = 'daily', period = None, start_date = None, end_date = None):
+    """asyncio version of coinalyze.predicted_funding_rate_history()"""
+    return await _history("/predicted-funding-rate-history", symbols, interval, period, start_date, end_date)
+
+async def liquidation_history(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0', interval = 'daily', period = None, start_date = None, end_date = None):
+    """asyncio version of coinalyze.liquidation_history()"""
+    return await _history("/liquidation-history", symbols, interval, period, start_date, end_date)
+
+async def long_short_history(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0', interval = 'daily', period = None, start_date = None, end_date = None):
+    """asyncio version of coinalyze.long_short_history()"""
+    return await _history("/long-short-ratio-history", symbols, interval, period, start_date, end_date)
+
+async def ohlcv_history(symbols = 'BTCUSDT_PERP.A,BTCUSD_PERP.0', interval = 'daily', period = None, start_date = None, end_date = None):
+    """asyncio version of coinalyze.ohlcv_history()"""
+    return await _history("/ohlcv-history", symbols, interval, period, start_date, end_date)
+
+# Fear and greed, bitvol, coinbase and FRED
+
+async def fng(limit = 30):
+    """asyncio version of leavenworth.fng()"""
+    return _fng_frame(await get(fng_url, params = _fng_params(limit)))
+
+async def bitvol(start_date = ly_date, end_date = today, currency = 'BTC'):
+    """asyncio version of leavenworth.bitvol()"""
+    url, headers = _bitvol_request(start_date, end_date, currency)
+    return _bitvol_frame(await get(url, headers = headers))
+
+async def btcusd_coinbase():
+    """asyncio version of helpers.btcusd_coinbase()"""
+    return _coinbase_price(await get(coinbase_endpoint))
+
+async def fred_data(series, observation_start = None, observation_end = None, **kwargs):
+    """asyncio version of leavenworth.fred_data(), talks to the FRED observations endpoint directly"""
+    r = await get(observations_url, params = _observations_params(series, observation_start, observation_end, **kwargs))
+    if r.status_code != 200:
+        raise ValueError('Error calling FRED API for series %s: Return status code is %s'%(series, r.status_code))
+    return _observations_series(r.json())
@@ -0,0 +1,80 @@
+import os
+import re
+import tempfile
+from pathlib import Path
+from os.path import expanduser
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    _format = 'parquet'
+except ImportError:  # pragma: no cover
+    _format = 'pickle'
+
+def cache_dir():
+    """This routine returns the local data cache directory. Define the location of the cache in env variable = lc_cache, defaults to ~/.leavenworth/cache"""
+    d = os.getenv('lc_cache')
+    if d:
+        d = Path(d)
+    else:
+        d = Path(expanduser('~'), '.leavenworth', 'cache')
+    d.mkdir(parents = True, exist_ok = True)
+    return d
+
+def cache_key(*parts):
+    """This routine builds a file system safe cache key, e.g. cache_key('glassnode', 'MVRV', 'BTC', '24h')"""
+    parts = [re.sub(r'[^A-Za-z0-9.-]+', '-', str(p)) for p in parts if p is not None]
+    return '_'.join(parts)
+
+def cache_path(key):
+    return cache_dir()/f'{key}.{_format}'
+
+def read_cache(key):
+    """This routine returns the cached DataFrame for key, or None if nothing has been cached yet"""
+    path = cache_path(key)
+    if not path.exists():
+        return None
+    if _format == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+def write_cache(key, data):
+    """This routine writes data (DataFrame or Series) to the cache. The file is swapped in atomically so concurrent readers never see a partial write"""
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    path = cache_path(key)
+    # A unique temp file per writer, so threads writing the same key never share one
+    with tempfile.NamedTemporaryFile(dir = path.parent, prefix = f'{path.name}.', suffix = '.tmp', delete = False) as f:
+        tmp = f.name
+    try:
+        if _format == 'parquet':
+            data.to_parquet(tmp)
+        else:
+            data.to_pickle(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
+
+def merge_tail(cached, tail):
+    """This routine appends freshly fetched rows to cached rows. Overlapping index values are replaced by the fresh data"""
+    if cached is None or len(cached) == 0:
+        return tail.sort_index()
+    if tail is None or len(tail) == 0:
+        return cached
+    data = pd.concat([cached, tail])
+    data = data[~data.index.duplicated(keep = 'last')]
+    return data.sort_index()
+
+def clear_cache(key = None):
+    """This routine deletes the cached file for key, or the whole cache if no key is given"""
+    if key:
+        paths = [cache_path(key)]
+    else:
+        paths = cache_dir().glob(f'*.{_format}')
+    for path in paths:
+        if path.exists():
+            path.unlink()
+    return None
@@ -1,10 +1,34 @@
-import requests
+from . import transport
+import numpy as np
 import pandas as pd
-from .helpers import typeassert, configure_api_keys
+from .helpers import typeassert, configure_api_keys, RateLimiter
+from .cache import cache_key, cache_path, read_cache, write_cache, clear_cache
+from collections import namedtuple, deque
+import threading
+import time
 from datetime import datetime, timedelta
 from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
+import re
 
 intervals = ["1min", "5min", "15min", "30min", "1hour", "2hour", "4hour", "6hour", "12hour", "daily"]
+interval_seconds = dict(zip(intervals, [60, 300, 900, 1800, 3600, 7200, 14400, 21600, 43200, 86400]))
+period_units = {'d': timedelta(days=1), 'w': timedelta(weeks=1), 'm': timedelta(days=30), 'y': timedelta(days=365)}
+# History endpoints cap the number of bars returned per request, long windows are split into chunks of this many bars
+chunk_points = 1000
+# Coinalyze accepts at most 20 symbols per request and 40 requests per minute per API key
+symbols_per_call = 20
+fan_out_workers = 4
+base_url = "https://api.coinalyze.net/v1"
+rate_limiter = RateLimiter(40, 60)
+# Exchange and market reference tables are refetched after this many seconds
+meta_ttl = 24*3600
+_meta = {}
+_meta_lock = threading.Lock()
+SymbolInfo = namedtuple('SymbolInfo', ['exchange', 'base_asset', 'quote_asset', 'is_perpetual'])
+# Snapshot endpoints SnapshotPoller can follow
+snapshot_endpoints = {'funding_rate': '/funding-rate', 'predicted_funding_rate': '/predicted-funding-rate', 'oi': '/open-interest'}
+Update = namedtuple('Update', ['symbol', 'update', 'value'])
 
 # generate a function that retruns a tuple of unix timestamps from a start and end date
 def get_unix_timestamps(start_date, end_date):
@@ -17,38 +41,73 @@ def get_unix_timestamps(start_date, end_date):
 
 # generate a function that returns a tuple of unix timestamps from a period input
 def get_unix_timestamps_from_period(period):
-    """"This routine returns a tuple of unix timestamps from a period input"""
+    """This routine returns a tuple of unix timestamps covering the given period up to now. Periods are a count followed by d (days), w (weeks), m (months of 30 days) or y (years), e.g. 1d, 2w, 1m, 6m, 1y. ytd is also supported"""
     if period == 'default':
         period = '1m'
     now = datetime.now()
-    today = now.date().strftime('%Y-%m-%d')
-    last_year =  datetime.now() - timedelta(days=1*365)
-    ly_date = last_year.date().strftime('%Y-%m-%d')
-    if period == '1d':
-        start_date = today
-        end_date = today
-    elif period == '1w':
-        start_date = today
-        end_date = today
-    elif period == '1m':
-        start_date = today
-        end_date = today
-    elif period == '1y':
-        start_date = ly_date
-        end_date = today
+    if period == 'ytd':
+        start = datetime(now.year, 1, 1)
     else:
-        raise Exception('Invalid period. Supported values are 1d, 1w, 1m, 1y')
-    return get_unix_timestamps(start_date, end_date)
+        match = re.fullmatch(r'(\d+)([dwmy])', period)
+        if not match:
+            raise Exception('Invalid period. Supported values are of the type 1d, 1w, 1m, 6m, 1y or ytd')
+        start = now - int(match.group(1))*period_units[match.group(2)]
+        start = datetime.combine(start.date(), datetime.min.time())
+    return (int(start.timestamp()), int(now.timestamp()))
+
+def chunk_window(start, end, interval, max_points=None):
+    """This routine splits the unix timestamp window [start, end] into consecutive windows holding at most max_points bars of interval each"""
+    if max_points is None:
+        max_points = chunk_points
+    step = interval_seconds[interval]*max_points
+    chunks = []
+    f = start
+    while True:
+        t = min(f + step, end)
+        chunks.append((f, t))
+        if t >= end:
+            break
+        f = t
+    return chunks
+
+def batch_symbols(symbols, size=None):
+    """This routine splits a comma-joined string (or list) of symbols into comma-joined batches the API accepts in one request"""
+    if size is None:
+        size = symbols_per_call
+    if isinstance(symbols, str):
+        symbols = symbols.split(',')
+    # Drop blanks and repeats but keep the caller's order
+    symbols = list(dict.fromkeys(s.strip() for s in symbols if s.strip()))
+    return [','.join(symbols[i:i + size]) for i in range(0, len(symbols), size)]
+
+def _fan_out(endpoint, params):
+    """Call endpoint once per params dict on a thread pool, under the module rate limiter, and concatenate the returned records"""
+    def call(p):
+        rate_limiter.acquire()
+        return api_call(endpoint, params=p)
+
+    if len(params) == 1:
+        return call(params[0])
+    with ThreadPoolExecutor(max_workers=fan_out_workers) as pool:
+        results = list(pool.map(call, params))
+    return [record for data in results for record in data]
+
+def _snapshot(endpoint, symbols):
+    """Shared routine for the current snapshot endpoints, large symbol lists are split into batches and fetched concurrently"""
+    params = [{'symbols': batch} for batch in batch_symbols(symbols)]
+    return to_df(_fan_out(endpoint, params))
 
 
 @typeassert(endpoint=str, params=dict)
 def api_call(endpoint, params=None):
     """This is the base call routine that pulls latest data from coinalyze.io for the given endpoint"""
-    url = "https://api.coinalyze.net/v1/open-interest"
-    api_key = configure_api_keys('coinalyze')
-    base_url = "https://api.coinalyze.net/v1"
-    url = base_url + endpoint
-    r = requests.get(url, headers={'api-key': api_key}, params = params)
+    r = transport.get(base_url + endpoint, headers=_headers(), params = params)
+    return _check(r)
+
+def _headers():
+    return {'api-key': configure_api_keys('coinalyze')}
+
+def _check(r):
     if r.status_code != 200:
         raise Exception(f"Error calling coinalyze.io API: Return status code is {r.status_code}")
     else:
@@ -70,127 +129,116 @@ def supported_markets(market_type='future'):
     data = api_call(endpoint)
     return to_df(data).drop_duplicates()
 
-@typeassert(symbols=str)
+@typeassert(symbols=(str, list))
 def current_funding_rate(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0'):
     """This routine pulls current funding rates from coinalyze.io"""
-    endpoint = "/funding-rate"
-    params = {'symbols': symbols}
-    data = api_call(endpoint, params=params)
-    return to_df(data)
+    return _snapshot("/funding-rate", symbols)
 
-@typeassert(symbols=str)
+@typeassert(symbols=(str, list))
 def predicted_funding_rate(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0'):
     """This routine pulls predicted funding rates from coinalyze.io"""
-    endpoint = "/predicted-funding-rate"
-    params = {'symbols': symbols}
-    data = api_call(endpoint, params=params)
-    return to_df(data)
+    return _snapshot("/predicted-funding-rate", symbols)
 
-@typeassert(symbols=str)
+@typeassert(symbols=(str, list))
 def oi(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0'):
     """This routine pulls latest open-interest from coinalyze.io"""
-    endpoint = "/open-interest"
-    params = {'symbols': symbols}
-    data = api_call(endpoint, params=params)
-    return to_df(data)
+    return _snapshot("/open-interest", symbols)
 
-@typeassert(symbols=str, interval=str, period=str)
-def oi_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None):
-    """This routine pulls historical open-interest from coinalyze.io"""
-    endpoint = "/open-interest-history"
+def _history(endpoint, symbols, interval, period, start_date, end_date):
+    """Shared routine for the history endpoints. The [from, to] window is split into chunks that fit in one response, fetched in parallel and stitched back together"""
+    return _stitch(_fan_out(endpoint, _history_params(symbols, interval, period, start_date, end_date)))
+
+def _history_params(symbols, interval, period, start_date, end_date):
+    """One params dict per symbol batch and time chunk"""
     if interval not in intervals:
         raise Exception(f"interval must be one of {intervals}")
-    if period is None:
-        period=get_unix_timestamps_from_period('default')
+    if start_date is not None:
+        if end_date is None:
+            # Run up to now, like the period windows, so today's bars are included
+            window = (int(datetime.strptime(start_date, '%Y-%m-%d').timestamp()), int(datetime.now().timestamp()))
+        else:
+            window = get_unix_timestamps(start_date, end_date)
+    elif period is None:
+        window = get_unix_timestamps_from_period('default')
     else:
-        period=get_unix_timestamps_from_period(period)
-    params = {'symbols': symbols, 'interval': interval, 'from': period[0], 'to': period[1]}
-    data = api_call(endpoint, params=params)
-    return to_df(data, flatten=True)
+        window = get_unix_timestamps_from_period(period)
+    return [{'symbols': batch, 'interval': interval, 'from': f, 'to': t} for batch in batch_symbols(symbols) for f, t in chunk_window(window[0], window[1], interval)]
+
+def _stitch(data):
+    """Flatten the concatenated history records of all chunks into one frame"""
+    if not any(d.get('history') for d in data):
+        return pd.DataFrame()
+    df = to_df(data, flatten=True).reset_index()
+    # Neighbouring chunks share their boundary timestamp
+    df = df.drop_duplicates(subset=['symbol', 't'], keep='last')
+    return df.sort_values(['symbol', 't']).set_index('symbol')
 
-@typeassert(symbols=str, interval=str, period=str)
-def funding_rate_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None):
+@typeassert(symbols=(str, list), interval=str, period=str, start_date=str, end_date=str)
+def oi_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None, start_date=None, end_date=None):
+    """This routine pulls historical open-interest from coinalyze.io"""
+    return _history("/open-interest-history", symbols, interval, period, start_date, end_date)
+
+@typeassert(symbols=(str, list), interval=str, period=str, start_date=str, end_date=str)
+def funding_rate_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None, start_date=None, end_date=None):
     """This routine pulls historical funding rates from coinalyze.io"""
-    endpoint = "/funding-rate-history"
-    if interval not in intervals:
-        raise Exception(f"interval must be one of {intervals}")
-    if period is None:
-        period=get_unix_timestamps_from_period('default')
-    else:
-        period=get_unix_timestamps_from_period(period)
-    params = {'symbols': symbols, 'interval': interval, 'from': period[0], 'to': period[1]}
-    data = api_call(endpoint, params=params)
-    return to_df(data, flatten=True)
+    return _history("/funding-rate-history", symbols, interval, period, start_date, end_date)
 
-@typeassert(symbols=str, interval=str, period=str)
-def predicted_funding_rate_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None):
+@typeassert(symbols=(str, list), interval=str, period=str, start_date=str, end_date=str)
+def predicted_funding_rate_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None, start_date=None, end_date=None):
     """This routine pulls historical predicted funding rates from coinalyze.io"""
-    endpoint = "/predicted-funding-rate-history"
-    if interval not in intervals:
-        raise Exception(f"interval must be one of {intervals}")
-    if period is None:
-        period=get_unix_timestamps_from_period('default')
-    else:
-        period=get_unix_timestamps_from_period(period)
-    params = {'symbols': symbols, 'interval': interval, 'from': period[0], 'to': period[1]}
-    data = api_call(endpoint, params=params)
-    return to_df(data, flatten=True)
+    return _history("/predicted-funding-rate-history", symbols, interval, period, start_date, end_date)
 
-@typeassert(symbols=str, interval=str, period=str)
-def liquidation_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None):
+@typeassert(symbols=(str, list), interval=str, period=str, start_date=str, end_date=str)
+def liquidation_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None, start_date=None, end_date=None):
     """This routine pulls historical liquidations from coinalyze.io"""
-    endpoint = "/liquidation-history"
-    if interval not in intervals:
-        raise Exception(f"interval must be one of {intervals}")
-    if period is None:
-        period=get_unix_timestamps_from_period('default')
-    else:
-        period=get_unix_timestamps_from_period(period)
-    params = {'symbols': symbols, 'interval': interval, 'from': period[0], 'to': period[1]}
-    data = api_call(endpoint, params=params)
-    return to_df(data, flatten=True)
+    return _history("/liquidation-history", symbols, interval, period, start_date, end_date)
 
-@typeassert(symbols=str, interval=str, period=str)
-def long_short_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None):
+@typeassert(symbols=(str, list), interval=str, period=str, start_date=str, end_date=str)
+def long_short_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None, start_date=None, end_date=None):
     """This routine pulls historical long/short positions from coinalyze.io"""
-    endpoint = "/long-short-ratio-history"
-    if interval not in intervals:
-        raise Exception(f"interval must be one of {intervals}")
-    if period is None:
-        period=get_unix_timestamps_from_period('default')
-    else:
-        period=get_unix_timestamps_from_period(period)
-    params = {'symbols': symbols, 'interval': interval, 'from': period[0], 'to': period[1]}
-    data = api_call(endpoint, params=params)
-    return to_df(data, flatten=True)
+    return _history("/long-short-ratio-history", symbols, interval, period, start_date, end_date)
 
-@typeassert(symbols=str, interval=str, period=str)
-def ohlcv_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None):
+@typeassert(symbols=(str, list), interval=str, period=str, start_date=str, end_date=str)
+def ohlcv_history(symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', interval='daily', period=None, start_date=None, end_date=None):
     """This routine pulls historical OHLC data from coinalyze.io"""
-    endpoint = "/ohlcv-history"
-    if interval not in intervals:
-        raise Exception(f"interval must be one of {intervals}")
-    if period is None:
-        period=get_unix_timestamps_from_period('default')
-    else:
-        period=get_unix_timestamps_from_period(period)
-    params = {'symbols': symbols, 'interval': interval, 'from': period[0], 'to': period[1]}
-    data = api_call(endpoint, params=params)
-    return to_df(data, flatten=True)
+    return _history("/ohlcv-history", symbols, interval, period, start_date, end_date)
 
 def time_unit(s):
-    x=s.astype(str).apply(lambda x: len(x)).max()
-    if x==10:
+    """This routine returns the to_datetime unit of a column of unix timestamps, s for seconds (10 digits) or ms for milliseconds (13 digits)"""
+    values = np.asarray(s, dtype='float64')
+    x = np.nanmax(np.abs(values)) if values.size else 0
+    if x < 1e11:
         return 's'
-    elif x==13:
+    elif x < 1e14:
         return 'ms'
     else:
         raise ValueError('Invalid time unit')
 
+def _flatten_history(data):
+    """This routine flattens the history records of every symbol into one column per field, filled into preallocated arrays. Fields other than t are float64"""
+    histories = [d.get('history') or [] for d in data]
+    sizes = [len(h) for h in histories]
+    n = sum(sizes)
+    fields = list(dict.fromkeys(k for h in histories for row in h[:1] for k in row))
+    for h in histories:
+        # Rows of one symbol share their fields, only scan the rest when the first row disagrees
+        if any(row.keys() != h[0].keys() for row in h[1:]):
+            fields += [k for row in h for k in row if k not in fields]
+    columns = {k: np.empty(n, dtype='int64') if k == 't' else np.full(n, np.nan) for k in fields}
+    pos = 0
+    for h, size in zip(histories, sizes):
+        if not size:
+            continue
+        for k, col in columns.items():
+            col[pos:pos + size] = [row.get(k, np.nan) for row in h]
+        pos += size
+    symbols = np.repeat(np.array([d['symbol'] for d in data], dtype=object), sizes)
+    return pd.DataFrame(columns, index=pd.Index(symbols, name='symbol'))
+
 def to_df(data, flatten=False):
     """This routine converts the data returned from coinalyze.io to a pandas dataframe"""
     if flatten:
-        df = pd.json_normalize(data, meta=['symbol'], record_path =['history']).set_index('symbol')
+        df = _flatten_history(data)
         unit=time_unit(df['t'])
         df['t'] = pd.to_datetime(df['t'], unit=unit)
     else:
@@ -203,32 +251,217 @@ def to_df(data, flatten=False):
 
 def filter_markets(df, base_asset=["BTC"], quote_asset=["USD","USDT","BUSD","USDC"]):
     """This routine filters the markets based on the base and quote assets"""
-    return df.query(f'base_asset=={base_asset} and quote_asset=={quote_asset} and is_perpetual==True')
+    return df[df['base_asset'].isin(base_asset) & df['quote_asset'].isin(quote_asset) & (df['is_perpetual'] == True)]
 
 def filter_exchanges(df, exchanges=["Binance", "BitMEX", "Bybit", "Deribit", "Bitfinex", "OKX", "HuobiDM", "Kraken"]):
     """This routine filters the markets based on the exchanges"""
-    return df.query(f'name=={exchanges}')
+    return df[df['name'].isin(exchanges)]
+
+def _new_columns(df, meta):
+    return meta[[c for c in meta.columns if c not in df.columns]]
 
 def merge_exchange(df, ex):
     """This routine merges the exchange data with the market data"""
-    return pd.merge(df, ex, left_on='exchange', right_on='code').set_index('name').reset_index()
+    if ex.index.name != 'code':
+        ex = ex.set_index('code', drop=False)
+    df = df.join(_new_columns(df, ex), on='exchange', how='inner')
+    df = df[['name'] + [c for c in df.columns if c != 'name']]
+    return df if df.index.name == 'symbol' else df.reset_index(drop=True)
 
 def merge_markets(df, sm):
     """This routine merges data metrics with supported markets meta data"""
-    return pd.merge(df, sm, on='symbol')
-
-def merge_meta(df):
-    """This routine merges the exchange and market meta data with the data metrics"""
-    exchanges=exchanges()
-    exchanges=filter_exchanges(exchanges)
-    sm=supported_markets()
-    sm=filter_markets(sm)
-    if 'symbol' in df.columns.tolist():
-        df=merge_markets(df, sm)
+    if sm.index.name != 'symbol':
+        sm = sm.set_index('symbol')
+    if df.index.name == 'symbol':
+        return df.join(_new_columns(df, sm), how='inner')
+    return df.join(_new_columns(df, sm), on='symbol', how='inner').reset_index(drop=True)
+
+def _reference(name, fetch, ttl=None):
+    """Return reference table name from memory, else from the disk cache, else from the API. Copies older than ttl seconds are refetched"""
+    ttl = meta_ttl if ttl is None else ttl
+    now = time.time()
+    with _meta_lock:
+        hit = _meta.get(name)
+    if hit is not None and now - hit['fetched'] < ttl:
+        return hit
+    key = cache_key('coinalyze', name)
+    path = cache_path(key)
+    if path.exists() and now - path.stat().st_mtime < ttl:
+        df, fetched = read_cache(key), path.stat().st_mtime
+    else:
+        df, fetched = fetch(), now
+        write_cache(key, df)
+    hit = {'fetched': fetched, 'data': df, 'index': None}
+    with _meta_lock:
+        _meta[name] = hit
+    return hit
+
+def exchange_meta(ttl=None):
+    """This routine returns the supported exchanges indexed by exchange code. The table is cached in memory and on disk for ttl seconds (default meta_ttl)"""
+    return _reference('exchanges', lambda: exchanges().set_index('code', drop=False), ttl)['data']
+
+def _markets(market_type, ttl=None):
+    return _reference(f'{market_type}_markets', lambda: supported_markets(market_type).set_index('symbol'), ttl)
+
+@typeassert(market_type=str)
+def market_meta(market_type='future', ttl=None):
+    """This routine returns the supported markets indexed by symbol. The table is cached in memory and on disk for ttl seconds (default meta_ttl)"""
+    return _markets(market_type, ttl)['data']
+
+def symbol_info(symbol, market_type='future'):
+    """This routine returns SymbolInfo(exchange, base_asset, quote_asset, is_perpetual) for a symbol, or None if coinalyze does not list it"""
+    hit = _markets(market_type)
+    if hit['index'] is None:
+        # Build the hash index once per fetched table
+        names = exchange_meta()['name'].to_dict()
+        sm = hit['data']
+        hit['index'] = {
+            s: SymbolInfo(names.get(ex, ex), base, quote, bool(perp))
+            for s, ex, base, quote, perp in zip(sm.index, sm['exchange'], sm['base_asset'], sm['quote_asset'], sm['is_perpetual'])
+        }
+    return hit['index'].get(symbol)
+
+def refresh_meta():
+    """This routine drops the cached reference tables, they are refetched on next use"""
+    with _meta_lock:
+        _meta.clear()
+    for name in ['exchanges', 'future_markets', 'spot_markets']:
+        clear_cache(cache_key('coinalyze', name))
+    return None
+
+def merge_meta(df, base_asset=["BTC"], quote_asset=["USD","USDT","BUSD","USDC"], exchange_names=["Binance", "BitMEX", "Bybit", "Deribit", "Bitfinex", "OKX", "HuobiDM", "Kraken"]):
+    """This routine merges the exchange and market meta data with the data metrics. Reference tables come from the cached exchange_meta() and market_meta()"""
+    ex = filter_exchanges(exchange_meta(), exchanges=exchange_names)
+    sm = filter_markets(market_meta(), base_asset=base_asset, quote_asset=quote_asset)
+    if 'symbol' in df.columns.tolist() or df.index.name == 'symbol':
+        df = merge_markets(df, sm)
     if 'exchange' in df.columns.tolist():
-        df=merge_exchange(df, exchanges)
+        df = merge_exchange(df, ex)
     return df
 
 def gen_symbols(df):
+    """This routine joins the symbols of a markets DataFrame into one string. Any number of symbols can be passed to the data routines, they are batched per request"""
     symbols=list(df.symbol.unique())
-    return ','.join(symbols)
\ No newline at end of file
+    return ','.join(symbols)
+
+class SnapshotPoller:
+    """
+    This class polls one of the snapshot endpoints (funding_rate, predicted_funding_rate or oi) every `every` seconds and keeps only
+    the rows whose update timestamp changed since the previous poll. Changed rows are Update(symbol, update, value) tuples with update
+    in unix milliseconds, stored in a ring buffer of the last maxlen updates. DataFrames are only built on request by frame() and rolling()
+    """
+
+    def __init__(self, kind='funding_rate', symbols='BTCUSDT_PERP.A,BTCUSD_PERP.0', every=60, maxlen=100000):
+        if kind not in snapshot_endpoints:
+            raise Exception(f"kind must be one of {list(snapshot_endpoints)}")
+        self.endpoint = snapshot_endpoints[kind]
+        self.params = [{'symbols': batch} for batch in batch_symbols(symbols)]
+        self.every = every
+        self.buffer = deque(maxlen=maxlen)
+        self.last = {}
+        self.newest = 0
+        self.errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """This routine fetches one snapshot and returns the list of rows that changed since the previous poll"""
+        changed = []
+        for record in _fan_out(self.endpoint, self.params):
+            symbol, update = record['symbol'], record['update']
+            # Coinalyze reports updates in ms, second resolution values are scaled to match
+            update = int(update if update >= 1e11 else update*1000)
+            if self.last.get(symbol) == update:
+                continue
+            self.last[symbol] = update
+            self.newest = max(self.newest, update)
+            changed.append(Update(symbol, update, record['value']))
+        self.buffer.extend(changed)
+        return changed
+
+    def stream(self, polls=None, skip_errors=False):
+        """
+        This routine yields the changed rows of each poll, polling on a fixed schedule until stop() or until polls polls were made.
+        With skip_errors a failed poll is logged, counted in errors (the exception is kept in last_error) and yields no rows instead of ending the stream
+        """
+        self._stop.clear()
+        next_run = time.monotonic()
+        n = 0
+        while not self._stop.is_set() and (polls is None or n < polls):
+            try:
+                changed = self.poll()
+            except Exception as e:
+                if not skip_errors:
+                    raise
+                self.errors += 1
+                self.last_error = e
+                print('WARNING: coinalyze %s poll failed, retrying on schedule: %s'%(self.endpoint, e))
+                changed = []
+            yield changed
+            n += 1
+            next_run += self.every
+            if polls is None or n < polls:
+                self._stop.wait(max(0.0, next_run - time.monotonic()))
+
+    def start(self, callback=None):
+        """
+        This routine polls in a background thread. callback, if given, is called with the changed rows of every poll that has any.
+        Failed polls and callbacks are logged and counted in errors, the thread keeps polling on schedule
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self
+
+        def run():
+            for changed in self.stream(skip_errors=True):
+                if changed and callback is not None:
+                    try:
+                        callback(changed)
+                    except Exception as e:
+                        self.errors += 1
+                        self.last_error = e
+                        print('WARNING: SnapshotPoller callback failed: %s'%e)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self
+
+    def is_alive(self):
+        """This routine tells whether the background thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """This routine stops stream() and the background thread"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        return None
+
+    def _since(self, window):
+        """Updates of the last window seconds. The buffer is in poll order, not update order, so every row is checked"""
+        if window is None or not self.buffer:
+            return list(self.buffer)
+        cutoff = self.newest - int(window*1000)
+        return [r for r in self.buffer if r.update > cutoff]
+
+    def frame(self, window=None):
+        """This routine returns the buffered updates, optionally only those of the last window seconds, as a DataFrame"""
+        df = pd.DataFrame(self._since(window), columns=Update._fields)
+        df['update'] = pd.to_datetime(df['update'], unit='ms')
+        return df
+
+    def latest(self):
+        """This routine returns the latest value per symbol"""
+        latest = {}
+        for r in reversed(self.buffer):
+            if r.symbol not in latest:
+                latest[r.symbol] = r.value
+                if len(latest) == len(self.last):
+                    break
+        return pd.Series(latest, name='value').rename_axis('symbol')
+
+    def rolling(self, window=3600, stats=('mean', 'min', 'max', 'last', 'count')):
+        """This routine aggregates the updates of the last window seconds per symbol"""
+        df = pd.DataFrame(self._since(window), columns=Update._fields)
+        return df.groupby('symbol')['value'].agg(list(stats))
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from .glassnode import glassnode_many
+from .helpers import metric_registry
+from .glassnode_api import to_epoch
+from .returns import rolling_stat
+
+# A metric computed locally from other metrics. inputs are base metric names (see glassnode_params()) or other derived metrics,
+# formula gets one Series per input and returns a Series or a DataFrame. lookback is the number of bars formula needs before the first output
+Derived = namedtuple('Derived', ['name', 'inputs', 'formula', 'lookback'])
+
+_derived = {}
+_resolution_seconds = {'10m': 600, '1h': 3600, '24h': 86400, '1w': 7*86400, '1month': 31*86400}
+
+def derived_metric(name, inputs, lookback = 0):
+    """Decorator registering formula as derived metric name, e.g. @derived_metric('MVRV', ['MCAP', 'RCAP'])"""
+    def register(formula):
+        _derived[name] = Derived(name, tuple(inputs), formula, lookback)
+        return formula
+    return register
+
+def derived_params():
+    """Returns the names of all derived metrics"""
+    return list(_derived)
+
+def _sma(s, window):
+    return pd.Series(rolling_stat(s.to_numpy(), window), index = s.index)
+
+def _ribbon(s, windows):
+    values = s.to_numpy()
+    return pd.DataFrame({'ma%d'%w: rolling_stat(values, w) for w in windows}, index = s.index)
+
+@derived_metric('MVRV', ['MCAP', 'RCAP'])
+def mvrv(mcap, rcap):
+    return mcap/rcap
+
+@derived_metric('NUPL', ['MCAP', 'RCAP'])
+def nupl(mcap, rcap):
+    return (mcap - rcap)/mcap
+
+@derived_metric('REALIZED_PRICE', ['RCAP', 'CIRCULATING_SUPPLY'])
+def realized_price(rcap, supply):
+    return rcap/supply
+
+@derived_metric('SSR_OSC', ['SSR'], lookback = 200)
+def ssr_oscillator(ssr):
+    # Bollinger %B of the SSR over a 200 bar SMA with 2 standard deviation bands
+    values = ssr.to_numpy()
+    mean = rolling_stat(values, 200)
+    std = rolling_stat(values, 200, method = 'std')
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return pd.Series((values - (mean - 2*std))/(4*std), index = ssr.index)
+
+@derived_metric('HASH_RIBBON', ['HASH_RATE'], lookback = 60)
+def hash_ribbon(hash_rate):
+    return _ribbon(hash_rate, [30, 60])
+
+@derived_metric('DIFFICULTY_RIBBON', ['DIFFICULTY'], lookback = 200)
+def difficulty_ribbon(difficulty):
+    return _ribbon(difficulty, [9, 14, 25, 40, 60, 90, 128, 200])
+
+def _plan(metrics):
+    """Base metrics to fetch and derived metrics in dependency order, plus the bars of warm-up history needed"""
+    registry = metric_registry()
+    bases, order, lookback, visiting = [], [], {}, set()
+
+    def visit(name):
+        if name in lookback:
+            return lookback[name]
+        if name in visiting:
+            raise Exception('Derived metric %s depends on itself'%name)
+        if name not in _derived:
+            if name not in registry:
+                raise Exception('Unknown metric %s. Not configured in config file or as a derived metric'%name)
+            bases.append(name)
+            lookback[name] = 0
+            return 0
+        visiting.add(name)
+        d = _derived[name]
+        lookback[name] = d.lookback + max([visit(i) for i in d.inputs], default = 0)
+        visiting.discard(name)
+        order.append(name)
+        return lookback[name]
+
+    for metric in metrics:
+        visit(metric)
+    return bases, order, max([lookback[m] for m in metrics], default = 0)
+
+def derive(metrics, currency = 'BTC', resolution = '24h', since = None, until = None, cache = False, max_workers = 8, rate_limit = 60, debug = False):
+    """
+    Computes derived metrics locally from their base series. Every base series is pulled once (concurrently, via glassnode_many)
+    and every intermediate is computed once, however many requested metrics share it.
+    Required arguments:
+        metrics: list of derived and/or base metric names, see derived_params() and glassnode_params()
+    Optional arguments:
+        since, until: range of the result. Base series are pulled from far enough before since to warm up rolling windows
+        currency, resolution, cache, max_workers, rate_limit: passed through to glassnode_many()
+    Typical usage:
+        df = derive(['MVRV', 'NUPL', 'SSR_OSC', 'HASH_RIBBON'], cache = True)
+    Frame valued metrics (ribbons) come back as one column per band, e.g. HASH_RIBBON_ma30
+    """
+    metrics = [m.upper() for m in metrics]
+    bases, order, lookback = _plan(metrics)
+    start = since
+    if since is not None and lookback:
+        start = to_epoch(since) - lookback*_resolution_seconds.get(resolution, 86400)
+    if debug:
+        print('Fetching %s to compute %s'%(', '.join(bases), ', '.join(order)))
+    base = glassnode_many(bases, currencies = currency, max_workers = max_workers, rate_limit = rate_limit, debug = debug, cache = cache, resolution = resolution, since = start, until = until)
+    memo = {name: base[name] for name in bases if name in base}
+    for name in order:
+        d = _derived[name]
+        missing = [i for i in d.inputs if i not in memo]
+        if missing:
+            print('WARNING: cannot compute %s, no data for %s'%(name, ', '.join(missing)))
+            continue
+        memo[name] = d.formula(*[memo[i] for i in d.inputs])
+    columns = {}
+    for metric in metrics:
+        if metric not in memo:
+            continue
+        data = memo[metric]
+        if isinstance(data, pd.DataFrame):
+            for c in data.columns:
+                columns['%s_%s'%(metric, c)] = data[c]
+        else:
+            columns[metric] = data
+    if not columns:
+        return pd.DataFrame()
+    df = pd.DataFrame(columns)
+    if since is not None:
+        df = df.loc[pd.to_datetime(to_epoch(since), unit = 's'):]
+    return df
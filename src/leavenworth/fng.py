@@ -1,22 +1,65 @@
-import requests
+from . import transport
 import pandas as pd
-from datetime import datetime
-import janitor
+from .cache import cache_key, read_cache, write_cache
 
-def fng(limit = 30):
-    url = "https://api.alternative.me/fng/"
+url = "https://api.alternative.me/fng/"
+classifications = pd.CategoricalDtype(['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed'], ordered=True)
+# The index is published once a day
+update_interval = pd.Timedelta(days=1)
+
+def _params(limit):
     p = {}
-    if limit:
+    if limit is not None:
+        # limit = 0 returns the full history
         p['limit'] = limit
-        
-    r = requests.get(url, params=p)
+    return p
+
+def _frame(r):
     if r.status_code != 200:
         raise Exception(f"Error calling Fear and Greed API: Return status code is {r.status_code}")
     else:
         d = r.json()['data']
         df = pd.DataFrame.from_dict(d)
-        df['timestamp'] = df.timestamp.astype(int)
-        df['timestamp'] = df.timestamp.apply(lambda x: datetime.fromtimestamp(x))
-        df['value'] = df.value.astype(int)
-        df = df.clean_names(case_type = 'upper')
-        return df
\ No newline at end of file
+        df.columns = [c.upper() for c in df.columns]
+        if df.empty:
+            return df
+        # Timestamps are UTC midnights, converted in one pass
+        df['TIMESTAMP'] = pd.to_datetime(df.TIMESTAMP.astype('int64'), unit='s')
+        df['VALUE'] = df.VALUE.astype('uint8')
+        df['VALUE_CLASSIFICATION'] = df.VALUE_CLASSIFICATION.astype(classifications)
+        return df
+
+def _history():
+    """Full daily history through the local cache. Only the days published since the last cached day are requested"""
+    key = cache_key('fng')
+    cached = read_cache(key)
+    if cached is not None and len(cached):
+        last = cached.TIMESTAMP.iloc[-1]
+        if pd.Timestamp.now(tz='UTC').tz_localize(None) < last + update_interval:
+            return cached
+        # Ask for the days since the last cached one, plus that day in case it was revised
+        limit = (pd.Timestamp.now(tz='UTC').tz_localize(None) - last).days + 2
+    else:
+        cached, limit = None, 0
+    new = _frame(transport.get(url, params=_params(limit)))[['VALUE', 'VALUE_CLASSIFICATION', 'TIMESTAMP']]
+    df = new if cached is None else pd.concat([cached, new])
+    df = df.drop_duplicates(subset=['TIMESTAMP'], keep='last').sort_values('TIMESTAMP', ignore_index=True)
+    df['VALUE_CLASSIFICATION'] = df.VALUE_CLASSIFICATION.astype(classifications)
+    write_cache(key, df)
+    return df
+
+def fng(limit = 30, cache = False):
+    """
+    This routine pulls the latest limit days of the Fear and Greed index (limit = 0 for the full history), newest first.
+    With cache = True the full history is kept locally and only new days are downloaded, at most once a day
+    Typical usage:
+        df = fng()
+        df = fng(limit = 0, cache = True)
+    """
+    if cache:
+        df = _history()
+        if limit:
+            df = df.tail(limit)
+        return df.iloc[::-1].reset_index(drop=True)
+    r = transport.get(url, params=_params(limit))
+    return _frame(r)
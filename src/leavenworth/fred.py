@@ -1,14 +1,144 @@
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from fredapi import Fred
-from .helpers import configure_api_keys
+from . import transport
+from .helpers import configure_api_keys, RateLimiter
+from .cache import cache_key, cache_path, read_cache, write_cache, merge_tail
 
-FRED_API_KEY = configure_api_keys('fred')
-fred = Fred(api_key=FRED_API_KEY)
+_fred = None
+_fred_lock = threading.Lock()
+# Cached observations younger than this many seconds are used without asking FRED for updates
+cache_ttl = 12*3600
+# FRED allows 120 requests per minute per API key
+rate_limiter = RateLimiter(120, 60)
+_info = {}
+_info_lock = threading.Lock()
 
-def fred_data(series, **kwargs):
-    return fred.get_series(series, **kwargs)
+def fred_client():
+    """This routine returns the shared fredapi.Fred client. The API key is only read from api.json on first use"""
+    global _fred
+    if _fred is None:
+        with _fred_lock:
+            if _fred is None:
+                _fred = Fred(api_key=configure_api_keys('fred'))
+    return _fred
+
+def __getattr__(name):
+    # Backwards compatible access to the formerly eagerly created module globals
+    if name == 'fred':
+        return fred_client()
+    if name == 'FRED_API_KEY':
+        return fred_client().api_key
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def fred_data(series, cache = False, **kwargs):
+    """
+    Pulls the observations of a FRED series. With cache = True the series is kept locally and only observations since the last cached date are requested,
+    at most once per cache_ttl seconds. observation_start and observation_end then select from the cached series
+    Typical usage:
+        s = fred_data('VIXCLS')
+        s = fred_data('CPIAUCSL', cache = True, observation_start = '2020-01-01')
+    """
+    if cache:
+        return _cached_series(series, **kwargs)
+    return fred_client().get_series(series, **kwargs)
+
+def fred_many(series, max_workers = 8, cache = False, **kwargs):
+    """
+    Pulls several FRED series concurrently (within the FRED rate limit) into one DataFrame with a column per series. cache is passed through to fred_data()
+    Typical usage:
+        df = fred_many(['VIXCLS', 'DGS10', 'CPIAUCSL', 'M2SL'])
+        df = fred_many(['VIXCLS', 'DGS10'], cache = True)
+    """
+    if isinstance(series, str):
+        series = [series]
+    series = list(dict.fromkeys(series))
+
+    def fetch(s):
+        if not cache:
+            rate_limiter.acquire()
+        return fred_data(s, cache = cache, **kwargs)
+
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        results = list(pool.map(fetch, series))
+    if not series:
+        return pd.DataFrame()
+    return pd.concat(dict(zip(series, results)), axis = 1).sort_index()
     
 def fred_search(series, **kwargs):
-    return fred.search(series, **kwargs)
+    return fred_client().search(series, **kwargs)
 
 def fred_series_info(series, **kwargs):
-    return fred.get_series_info(series, **kwargs)
\ No newline at end of file
+    """This routine returns the metadata of a FRED series. Results are kept in memory for the life of the process, see refresh_series_info()"""
+    if kwargs:
+        return fred_client().get_series_info(series, **kwargs)
+    with _info_lock:
+        info = _info.get(series)
+    if info is None:
+        info = fred_client().get_series_info(series)
+        with _info_lock:
+            _info[series] = info
+    return info.copy()
+
+def refresh_series_info():
+    """This routine drops the memoized series metadata, it is refetched on next use"""
+    with _info_lock:
+        _info.clear()
+    return None
+
+def _fetch_observations(series, observation_start = None, observation_end = None, **kwargs):
+    rate_limiter.acquire()
+    r = transport.get(observations_url, params = _observations_params(series, observation_start, observation_end, **kwargs))
+    if r.status_code != 200:
+        raise ValueError('Error calling FRED API for series %s: Return status code is %s'%(series, r.status_code))
+    return _observations_series(r.json())
+
+def _cached_series(series, observation_start = None, observation_end = None, **kwargs):
+    """Observations of series through the local cache, one file per series and set of extra request parameters (e.g. units)"""
+    key = cache_key('fred', series, *['%s-%s'%(k, kwargs[k]) for k in sorted(kwargs)])
+    path = cache_path(key)
+    cached = read_cache(key)
+    if cached is not None:
+        cached = cached.iloc[:, 0]
+    if cached is None or len(cached) == 0:
+        data = _fetch_observations(series, **kwargs)
+        write_cache(key, data.rename(series))
+    elif time.time() - path.stat().st_mtime >= cache_ttl:
+        # Re-request the last cached observation as well, it may have been revised
+        try:
+            tail = _fetch_observations(series, observation_start = cached.index[-1], **kwargs)
+        except Exception as e:
+            print('WARNING: could not refresh %s, returning cached data (%s)'%(key, e))
+            data = cached
+        else:
+            data = merge_tail(cached, tail.rename(cached.name))
+            write_cache(key, data)
+    else:
+        data = cached
+    data = data.rename(None)
+    if observation_start is not None or observation_end is not None:
+        start = None if observation_start is None else pd.Timestamp(observation_start)
+        end = None if observation_end is None else pd.Timestamp(observation_end)
+        data = data.loc[start:end]
+    return data
+
+observations_url = 'https://api.stlouisfed.org/fred/series/observations'
+
+def _observations_params(series, observation_start=None, observation_end=None, **kwargs):
+    """Query parameters of a FRED observations request, dates may be strings or datetimes"""
+    p = {'series_id': series, 'api_key': fred_client().api_key, 'file_type': 'json'}
+    if observation_start is not None:
+        p['observation_start'] = pd.Timestamp(observation_start).strftime('%Y-%m-%d')
+    if observation_end is not None:
+        p['observation_end'] = pd.Timestamp(observation_end).strftime('%Y-%m-%d')
+    p.update(kwargs)
+    return p
+
+def _observations_series(data):
+    """Series shaped like fredapi's get_series() from a JSON observations response. Missing values ('.') become NaN"""
+    observations = data['observations']
+    index = pd.to_datetime([o['date'] for o in observations])
+    values = pd.to_numeric(pd.Series([o['value'] for o in observations], index=index), errors='coerce')
+    return values.astype('float64')
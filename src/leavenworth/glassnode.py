@@ -1,18 +1,136 @@
-from .helpers import get_data, _config
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from .helpers import get_data, metric_registry, metric_info, RateLimiter
+
+# Shared by all bulk pulls of the process so back to back calls stay within the per minute API quota together
+rate_limiter = RateLimiter(60, 60)
 
 # class glassnode:
 #     def __init__(self, **kwargs):
         
-def glassnode(metric, currency = 'BTC', debug = False, post_process = True):
+def glassnode(metric, currency = 'BTC', debug = False, post_process = True, cache = False, dtype = 'float64', resolution = '24h', since = None, until = None):
     """
     Required arguments:
         metric: not case-sensitive. Get a list of all supported metrics with glassnode_params() method
+    Optional arguments:
+        cache: keep a local copy of the series (see leavenworth.cache) and only pull new data since the last cached timestamp
+        dtype: column dtype for object valued metrics (e.g. supply age bands), which come back as one column per field. Use float32 to halve memory
+        resolution: bar size passed to the API, e.g. 24h, 1h or 10m (availability depends on the metric and API tier)
+        since, until: only rows in this range are requested from the API. ISO 8601 dates or unix seconds, taken as UTC when no timezone is given
     Typical usage:
         df = glassnode('PRICE') 
+        df = glassnode('PRICE', cache = True)
+        df = glassnode('EXCHANGE_BALANCE_STACKED', dtype = 'float32')
+        df = glassnode('PRICE', resolution = '1h', since = '2023-01-01', until = '2023-04-01')
     """
-    data = get_data(metric.upper(), currency = currency, source = 'glassnode', debug = debug,  post_process = post_process)
+    data = get_data(metric.upper(), currency = currency, source = 'glassnode', debug = debug,  post_process = post_process, cache = cache, dtype = dtype, resolution = resolution, since = since, until = until)
     return(data)
 
 def glassnode_params():
-    metrics = _config('', sections = True)
-    return metrics
\ No newline at end of file
+    """Returns the names of all supported metrics"""
+    return list(metric_registry())
+
+def glassnode_metric(metric):
+    """
+    Returns Metric(name, url, category, assets, resolutions) for a metric. assets and resolutions are None when not restricted
+    Typical usage:
+        glassnode_metric('mvrv').url
+    """
+    return metric_info(metric.upper())
+
+def glassnode_many(metrics, currencies = None, max_workers = 8, rate_limit = 60, debug = False, cache = False, resolution = '24h', since = None, until = None):
+    """
+    Pulls several metrics (and optionally several currencies) concurrently and joins them on the datetime index
+    Required arguments:
+        metrics: list of metric names, see glassnode_params()
+    Optional arguments:
+        currencies: str or list of assets, defaults to BTC. With more than one asset columns are named METRIC_ASSET
+        Object valued metrics come back as one column per field, named METRIC_field
+        max_workers: number of concurrent requests
+        rate_limit: maximum number of requests per minute across all bulk pulls of the process (sets the shared glassnode.rate_limiter), None to disable
+        cache, resolution, since, until: passed through to glassnode()
+    Typical usage:
+        df = glassnode_many(['PRICE', 'MVRV', 'SOPR'])
+        df = glassnode_many(['EXCHANGE_BALANCE'], currencies = ['BTC', 'ETH'])
+    """
+    if currencies is None:
+        currencies = ['BTC']
+    elif isinstance(currencies, str):
+        currencies = [currencies]
+    currencies = list(dict.fromkeys(currency.upper() for currency in currencies))
+    jobs = [(metric.upper(), currency) for currency in currencies for metric in metrics]
+    columns = {}
+    for (metric, currency), s in _fetch_all(jobs, max_workers, rate_limit, debug = debug, cache = cache, resolution = resolution, since = since, until = until):
+        name = metric if len(currencies) == 1 else '%s_%s'%(metric, currency)
+        if isinstance(s, pd.DataFrame):
+            # Object valued metrics get one column per field, as in glassnode_panel()
+            for field in s.columns:
+                columns['%s_%s'%(name, field)] = s[field]
+        else:
+            columns[name] = s
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(columns, axis = 1).sort_index()
+
+def _fetch_all(jobs, max_workers = 8, rate_limit = 60, **kwargs):
+    """Pull (metric, currency) jobs concurrently under the shared per minute rate limit. Returns ((metric, currency), data) pairs in job order, skipping repeated jobs and jobs without data"""
+    jobs = list(dict.fromkeys(jobs))
+    limiter = rate_limiter if rate_limit else None
+    if limiter and limiter.calls != rate_limit:
+        limiter.set_calls(rate_limit)
+
+    def fetch(job):
+        if limiter:
+            limiter.acquire()
+        return glassnode(job[0], currency = job[1], **kwargs)
+
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        results = list(pool.map(fetch, jobs))
+    out = []
+    for (metric, currency), data in zip(jobs, results):
+        if data is None:
+            print('WARNING: no data returned for %s (%s)'%(metric, currency))
+            continue
+        out.append(((metric, currency), data))
+    return out
+
+def glassnode_panel(metrics, assets = ['BTC', 'ETH'], max_workers = 8, rate_limit = 60, debug = False, cache = False, resolution = '24h', since = None, until = None):
+    """
+    Pulls metrics for several assets concurrently into one DataFrame with (asset, metric) columns on a shared datetime index
+    Required arguments:
+        metrics: metric name or list of metric names, see glassnode_params()
+    Optional arguments:
+        assets: list of assets. Metrics restricted to other assets (e.g. ETH_STAKED) are skipped for an asset
+        max_workers, rate_limit, cache, resolution, since, until: as in glassnode_many()
+    Object valued metrics get one column per field, named METRIC_field
+    Typical usage:
+        df = glassnode_panel('EXCHANGE_BALANCE', ['BTC', 'ETH'])
+        df['ETH']
+        df.xs('EXCHANGE_BALANCE', axis = 1, level = 'metric')
+        df = glassnode_panel(['ETH_STAKED', 'CIRCULATING_SUPPLY'], ['ETH'])
+    """
+    if isinstance(metrics, str):
+        metrics = [metrics]
+    if isinstance(assets, str):
+        assets = [assets]
+    jobs = []
+    for asset in assets:
+        for metric in metrics:
+            info = metric_info(metric.upper())
+            if info.assets and asset.upper() not in info.assets:
+                if debug:
+                    print('Skipping %s, only available for %s'%(info.name, ', '.join(info.assets)))
+                continue
+            jobs.append((info.name, asset.upper()))
+    columns = {}
+    for (metric, asset), data in _fetch_all(jobs, max_workers, rate_limit, debug = debug, cache = cache, resolution = resolution, since = since, until = until):
+        if isinstance(data, pd.DataFrame):
+            for field in data.columns:
+                columns[(asset, '%s_%s'%(metric, field))] = data[field]
+        else:
+            columns[(asset, metric)] = data
+    if not columns:
+        return pd.DataFrame(columns = pd.MultiIndex.from_tuples([], names = ['asset', 'metric']))
+    df = pd.concat(columns, axis = 1).sort_index()
+    df.columns.names = ['asset', 'metric']
+    return df
@@ -1,8 +1,15 @@
-import json
-import requests
+from . import transport
+from datetime import date, datetime, timezone
 import iso8601
+import numpy as np
 import pandas as pd
 
+# orjson parses the raw response bytes several times faster than the standard library, use it when installed
+try:
+  from orjson import loads
+except ImportError:  # pragma: no cover
+  from json import loads
+
 class GlassnodeClient:
 
   def __init__(self):
@@ -15,26 +22,26 @@ class GlassnodeClient:
   def set_api_key(self, value):
     self._api_key = value
 
-  def get(self, url, a='BTC', i='24h', c='native', s=None, u=None, debug=False, post_process = True):
+  def params(self, a='BTC', i='24h', c='native', s=None, u=None):
+    """Query parameters for a metric request"""
     p = dict()
     p['a'] = a
     p['i'] = i
     p['c'] = c
 
     if s is not None:
-      try:
-        p['s'] = iso8601.parse_date(s).strftime('%s')
-      except ParseError:
-        p['s'] = s
+      p['s'] = to_epoch(s)
 
     if u is not None:
-      try:
-        p['u'] = iso8601.parse_date(u).strftime('%s')
-      except ParseError:
-        p['u'] = s
+      p['u'] = to_epoch(u)
 
     p['api_key'] = self.api_key
-    r = requests.get(url, params=p)
+    return p
+
+  def get(self, url, a='BTC', i='24h', c='native', s=None, u=None, debug=False, post_process = True, dtype = 'float64'):
+    """Pull a metric. With post_process, scalar metrics come back as a Series and object valued metrics (an 'o' field per row) as a DataFrame with one dtype column per field"""
+    p = self.params(a=a, i=i, c=c, s=s, u=u)
+    r = transport.get(url, params=p)
 
     try:
        r.raise_for_status()
@@ -42,8 +49,50 @@ class GlassnodeClient:
         print(e)
         print(r.text)
 
+    return parse(r.content, url, debug=debug, post_process=post_process, dtype=dtype)
+
+
+def to_epoch(value):
+  """Unix seconds for an epoch (int or digit string), an ISO 8601 string, a date or a datetime. Values without a timezone are taken as UTC"""
+  if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+    return int(value)
+  if isinstance(value, (int, np.integer)):
+    return int(value)
+  if isinstance(value, str):
     try:
-        df = pd.DataFrame(json.loads(r.text))
+      value = iso8601.parse_date(value, default_timezone=timezone.utc)
+    except iso8601.ParseError:
+      raise Exception('Invalid date %s. Use an ISO 8601 date such as 2023-01-01 or unix seconds'%value)
+  elif isinstance(value, date) and not isinstance(value, datetime):
+    value = datetime(value.year, value.month, value.day)
+  if isinstance(value, datetime):
+    if value.tzinfo is None:
+      value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+  raise Exception('Invalid date %r'%(value,))
+
+
+def parse(content, url, debug=False, post_process=True, dtype='float64'):
+    """Turn a raw metric response body into a Series, or a DataFrame for object valued metrics or when post_process is False"""
+    try:
+        rows = loads(content)
+        name = '_'.join(url.split('/')[-2:])
+        if post_process and rows and 'v' in rows[0]:
+          try:
+            s = to_series(rows, name)
+            if debug:
+              print('Data type returned is %s with %d rows'%(type(s), len(s)))
+            return s
+          except (TypeError, ValueError):
+            # Non numeric values, use the generic path below
+            pass
+        if post_process and rows and 'o' in rows[0]:
+          df = to_frame(rows, name, dtype=dtype)
+          if debug:
+            print('Data type returned is %s'%type(df))
+            print('Columns are %s'%df.columns)
+          return df
+        df = pd.DataFrame(rows)
         if debug: 
           print('Data type returned is %s'%type(df))
           print('Columns are %s'%df.columns)
@@ -52,9 +101,68 @@ class GlassnodeClient:
           df.index = pd.to_datetime(df.index, unit='s')
           df = df.sort_index()
           s = df.v
-          s.name = '_'.join(url.split('/')[-2:])
+          s.name = name
           return s
         else:
           return df
     except Exception as e:
         print(e)
+
+
+def to_series(rows, name=None):
+  """Build a datetime indexed Series straight from [{'t': epoch, 'v': value}, ...] rows, without an intermediate DataFrame of objects"""
+  t = np.fromiter((row['t'] for row in rows), dtype=np.int64, count=len(rows))
+  # None (missing values) becomes NaN
+  v = np.array([row['v'] for row in rows], dtype=np.float64)
+  if len(t) > 1 and (np.diff(t) < 0).any():
+    order = np.argsort(t, kind='stable')
+    t, v = t[order], v[order]
+  index = pd.DatetimeIndex(t.astype('datetime64[s]'), name='t')
+  return pd.Series(v, index=index, name=name)
+
+
+def _paths(o, prefix=()):
+  for k, v in o.items():
+    if isinstance(v, dict):
+      yield from _paths(v, prefix + (k,))
+    else:
+      yield prefix + (k,)
+
+
+def _column(rows, path, dtype):
+  if len(path) == 1:
+    key = path[0]
+    values = [(row['o'] or {}).get(key) for row in rows]
+  else:
+    values = []
+    for row in rows:
+      v = row['o']
+      for key in path:
+        v = v.get(key) if isinstance(v, dict) else None
+      values.append(v)
+  try:
+    return np.array(values, dtype=dtype)
+  except (TypeError, ValueError):
+    return np.array(values, dtype=object)
+
+
+def to_frame(rows, name=None, dtype='float64'):
+  """Build a datetime indexed wide DataFrame from object valued rows [{'t': epoch, 'o': {field: value, ...}}, ...]. Nested fields are joined with _"""
+  t = np.fromiter((row['t'] for row in rows), dtype=np.int64, count=len(rows))
+  # Fields can come and go over the history, collect the union in order of first appearance
+  paths = {}
+  for key in dict.fromkeys(k for row in rows if row['o'] for k in row['o']):
+    sample = next((row['o'][key] for row in rows if row['o'] and row['o'].get(key) is not None), None)
+    if isinstance(sample, dict):
+      paths.update(dict.fromkeys(p for row in rows if row['o'] and isinstance(row['o'].get(key), dict) for p in _paths(row['o'][key], (key,))))
+    else:
+      paths[(key,)] = None
+  columns = {'_'.join(path): _column(rows, path, dtype) for path in paths}
+  if len(t) > 1 and (np.diff(t) < 0).any():
+    order = np.argsort(t, kind='stable')
+    t = t[order]
+    columns = {k: v[order] for k, v in columns.items()}
+  index = pd.DatetimeIndex(t.astype('datetime64[s]'), name='t')
+  df = pd.DataFrame(columns, index=index, copy=False)
+  df.columns.name = name
+  return df
@@ -2,37 +2,102 @@ import os
 import configparser
 from pathlib import Path
 import json
-from .glassnode_api import GlassnodeClient
+import pandas as pd
+from .glassnode_api import GlassnodeClient, to_epoch
+from .cache import cache_key, read_cache, write_cache, merge_tail
 from datetime import datetime
 from pathlib import Path
 from inspect import signature
 from functools import wraps
-import requests
+from collections import deque, namedtuple
+from types import MappingProxyType
+import threading
+import time
+from . import transport
+
+# Argument type checks can be switched off in production with env variable lc_typecheck = 0, or by setting helpers.typecheck = False
+typecheck = os.getenv('lc_typecheck', '1').lower() not in ['0', 'false', 'no']
 
-# Should only be used on functions/methods that don't have keyword arguments
 def typeassert(*ty_args, **ty_kwargs):
+    """
+    Decorator enforcing argument types, e.g. @typeassert(symbols=str, interval=str).
+    The signature is inspected once when decorating, so a call only costs an isinstance check per typed argument.
+    Parameters that default to None also accept None
+    """
     def decorate(func):
         # Map function argument names to supplied types
         sig = signature(func)
         bound_types = sig.bind_partial(*ty_args, **ty_kwargs).arguments
+        checks = []
+        for position, param in enumerate(sig.parameters.values()):
+            if param.name not in bound_types:
+                continue
+            declared = bound_types[param.name]
+            allowed = declared if isinstance(declared, tuple) else (declared,)
+            if param.default is None:
+                allowed = allowed + (type(None),)
+            if param.kind not in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                position = None
+            checks.append((position, param.name, allowed, declared))
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            bound_values = sig.bind(*args, **kwargs)
-            # Enforce type assertions across supplied arguments
-            for name, value in bound_values.arguments.items():
-                if name in bound_types:
-                    if not isinstance(value, bound_types[name]):
+            if typecheck:
+                # Enforce type assertions across supplied arguments
+                n = len(args)
+                for position, name, allowed, declared in checks:
+                    if position is not None and position < n:
+                        value = args[position]
+                    elif name in kwargs:
+                        value = kwargs[name]
+                    else:
+                        continue
+                    if not isinstance(value, allowed):
                         raise TypeError(
-                            'Argument {} must be {}'.format(name, bound_types[name])
+                            'Argument {} must be {}'.format(name, declared)
                         )
             return func(*args, **kwargs)
         return wrapper
     return decorate
 
+class RateLimiter:
+    """Thread-safe limiter that allows at most `calls` acquisitions in any rolling window of `period` seconds"""
+
+    def __init__(self, calls, period = 60):
+        self.calls = calls
+        self.period = period
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a call if one is allowed now and return None, otherwise return the seconds until the next one is"""
+        with self._lock:
+            now = time.monotonic()
+            while self._times and now - self._times[0] >= self.period:
+                self._times.popleft()
+            if len(self._times) < self.calls:
+                self._times.append(now)
+                return None
+            return self.period - (now - self._times[0])
+
+    def acquire(self):
+        """Block until another call is allowed"""
+        while True:
+            wait = self.try_acquire()
+            if wait is None:
+                return None
+            time.sleep(wait)
+
+    def set_calls(self, calls):
+        """Change the number of calls allowed per period, calls already made in the current window still count"""
+        with self._lock:
+            self.calls = calls
+
 def configure_api_keys(api):
     """This returns API keys and if applicable passwords for APIs used by Leavenworth Capital as set in api.json. Define all location of secrets file in env variable = lc_secrets"""
     secrets_dir = os.getenv('lc_secrets')
+    if not secrets_dir:
+        raise Exception("lc_secrets env variable not set, can not authenticate against APIs used by Leavenworth Capital")
     file = Path(secrets_dir, 'api.json')
     if not file.exists():
         print(f"WARNING: {file} file not found, you cannot continue. Can not trigger login to APIs used by Leavenworth Capital")
@@ -43,47 +108,176 @@ def configure_api_keys(api):
         api_key = settings.get(api)
     return api_key
 
-GLASSNODE_API_KEY = configure_api_keys('glassnode')
-gn = GlassnodeClient()
-gn.set_api_key(GLASSNODE_API_KEY)
+_gn = None
+_gn_lock = threading.Lock()
+
+def glassnode_client():
+    """This routine returns the shared GlassnodeClient. The API key is only read from api.json on first use"""
+    global _gn
+    if _gn is None:
+        with _gn_lock:
+            if _gn is None:
+                client = GlassnodeClient()
+                client.set_api_key(configure_api_keys('glassnode'))
+                _gn = client
+    return _gn
 
-def _config(param, debug = False, sections = False):
-    """Helper function to read config.ini file"""
+def __getattr__(name):
+    # Backwards compatible access to the formerly eagerly created module globals
+    if name == 'gn':
+        return glassnode_client()
+    if name == 'GLASSNODE_API_KEY':
+        return glassnode_client().api_key
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+Metric = namedtuple('Metric', ['name', 'url', 'category', 'assets', 'resolutions'])
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def _split(value):
+    if not value:
+        return None
+    return tuple(v.strip() for v in value.split(',') if v.strip())
+
+def _load_registry():
     config = configparser.ConfigParser()
-    configini = str(Path(__file__).resolve().parent/'config.ini')
-    # abspath = os.path.dirname(os.path.abspath(__file__))
-    try:
-        if debug:
-            print(f'Param being pulled is {param}')
-            print(f'Reading config file in {configini}')
-        config.read(configini)
-    except:
+    configini = Path(__file__).resolve().parent/'config.ini'
+    if not config.read(configini):
         raise Exception('config.ini file not found')
-    if sections:
-        return(config.sections())
-    if param not in config:
+    metrics = {}
+    for name in config.sections():
+        section = config[name]
+        url = section['url']
+        # Optional keys assets and resolutions restrict a metric, e.g. assets = ETH
+        metrics[name] = Metric(name, url, url.rstrip('/').split('/')[-2], _split(section.get('assets')), _split(section.get('resolutions')))
+    return MappingProxyType(metrics)
+
+def metric_registry():
+    """This routine returns the read-only mapping of metric name -> Metric(name, url, category, assets, resolutions). config.ini is parsed once per process"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = _load_registry()
+    return _registry
+
+def metric_info(metric, debug = False):
+    """This routine returns the Metric registered under metric"""
+    try:
+        info = metric_registry()[metric]
+    except KeyError:
         raise Exception('Unknown parameter. Not configured in config file')
-    # base configs for any connection are server, database, and driver
-    global _value
-    _value = config[param]['url']
     if debug:
-        print('url for param %s is %s'%(param,_value))
-    return(None)
+        print('url for param %s is %s'%(metric, info.url))
+    return info
+
+def check_request(metric, currency = 'BTC', resolution = '24h', debug = False):
+    """This routine returns the Metric for metric after checking that currency and resolution are available for it"""
+    info = metric_info(metric, debug = debug)
+    if info.assets and currency.upper() not in info.assets:
+        raise Exception('%s is only available for %s'%(info.name, ', '.join(info.assets)))
+    if info.resolutions and resolution not in info.resolutions:
+        raise Exception('%s is only available at resolution %s'%(info.name, ', '.join(info.resolutions)))
+    return info
 
-def get_data(metric, currency = 'BTC', source = 'glassnode', debug = False, post_process = True):
-    _config(metric, debug = debug)
+def get_data(metric, currency = 'BTC', source = 'glassnode', debug = False, post_process = True, cache = False, dtype = 'float64', resolution = '24h', since = None, until = None):
+    currency = currency.upper()
+    info = check_request(metric, currency, resolution, debug = debug)
+    url = info.url
     if source == 'glassnode':
-        data = gn.get(_value, a = currency, debug = debug, post_process = post_process)
+        if cache and post_process:
+            data = _cached_get(metric, url, currency = currency, i = resolution, debug = debug, dtype = dtype, since = since, until = until)
+        else:
+            data = glassnode_client().get(url, a = currency, i = resolution, s = since, u = until, debug = debug, post_process = post_process, dtype = dtype)
     return(data)
 
+_index_lock = threading.Lock()
+
+def _coverage(key):
+    """Unix seconds from which the cached series key is complete (0 for the full history), None if unknown"""
+    with _index_lock:
+        index = read_cache('glassnode_index')
+    if index is None or key not in index.index:
+        return None
+    return int(index.loc[key, 'START'])
+
+def _set_coverage(key, start):
+    with _index_lock:
+        index = read_cache('glassnode_index')
+        if index is None:
+            index = pd.DataFrame({'START': pd.Series(dtype = 'int64')})
+            index.index.name = 'KEY'
+        index.loc[key, 'START'] = int(start)
+        write_cache('glassnode_index', index.astype({'START': 'int64'}))
+
+def _cached_get(metric, url, currency = 'BTC', i = '24h', debug = False, dtype = 'float64', since = None, until = None):
+    """
+    Pull a glassnode series (or frame for object valued metrics) through the local cache, one cache file per resolution.
+    The start each cache file is complete from is kept in the glassnode_index table. Only the tail since the last cached timestamp,
+    and the head when since (or no since, for the full history) reaches further back than that start, is requested from the API.
+    The returned data is cut to [since, until]
+    """
+    key = cache_key('glassnode', metric, currency, i)
+    cached = read_cache(key)
+    client = glassnode_client()
+    start = 0 if since is None else to_epoch(since)
+    if cached is None or len(cached) == 0:
+        data = client.get(url, a = currency, i = i, s = since, debug = debug, dtype = dtype)
+        covered = start
+    else:
+        # Scalar metrics are cached as a one column frame named after the series
+        name = '_'.join(url.split('/')[-2:])
+        if list(cached.columns) == [name]:
+            cached = cached[name]
+        first = int(cached.index[0].timestamp())
+        covered = _coverage(key)
+        if covered is None:
+            # Caches written before coverage was recorded are only known to hold their own rows
+            covered = first
+        if start < covered:
+            if debug:
+                print('Cache for %s starts at %s, requesting the missing head'%(key, cached.index[0]))
+            head = client.get(url, a = currency, i = i, s = since, u = first, debug = debug, dtype = dtype)
+            if head is not None:
+                cached = merge_tail(head, cached)
+                covered = start
+        # Re-request the last cached bar as well, it may have been revised since it was cached
+        last = int(cached.index[-1].timestamp())
+        if debug:
+            print('Cache hit for %s, requesting data since %s'%(key, cached.index[-1]))
+        tail = client.get(url, a = currency, i = i, s = last, debug = debug, dtype = dtype)
+        if tail is None:
+            print('WARNING: could not refresh %s, returning cached data'%key)
+            data = cached
+        else:
+            data = merge_tail(cached, tail)
+    if data is None:
+        return data
+    write_cache(key, data)
+    _set_coverage(key, covered)
+    return _window(data, since, until)
+
+def _window(data, since = None, until = None):
+    """Rows of data between since and until (inclusive), both optional"""
+    if since is None and until is None:
+        return data
+    start = None if since is None else pd.to_datetime(to_epoch(since), unit = 's')
+    end = None if until is None else pd.to_datetime(to_epoch(until), unit = 's')
+    return data.loc[start:end]
+
 def validate_date(d, fmt = '%Y-%m-%d'):
     vd = datetime.strptime(d, fmt)
     return vd
     
 
+coinbase_endpoint = 'https://api.coinbase.com/v2/exchange-rates?currency=USD'  # this is the coinbase API endpoint for the data
+
 def btcusd_coinbase():
-    endpoint = 'https://api.coinbase.com/v2/exchange-rates?currency=USD'  # this is the coinbase API endpoint for the data
-    response = requests.get(endpoint)
+    response = transport.get(coinbase_endpoint)
+    return _coinbase_price(response)
+
+def _coinbase_price(response):
     if response.status_code == 200:
         data = json.loads(response.text)
     else:
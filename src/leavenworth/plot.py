@@ -7,21 +7,40 @@ from matplotlib import ticker
 import matplotlib.ticker as mtick
 import matplotlib.lines as mlines
 import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 lc_colors = ["#7C9eA6", "#2e4959",'#cc9933', '#cccccc', '#434343']
 
+# Batch rendering state, see batch_mode() and render_batch()
+_batch = False
+_theme = None
+_figure = None
+_font_dirs = set()
+
 def lc_fonts(font_dir = None):
     """Use Leavenworth fonts"""
     if font_dir:
         pass
     else:
         font_dir = os.path.join(expanduser('~'), 'lcfonts')
+    # Scanning the font directory is slow, only do it once per process
+    if font_dir in _font_dirs:
+        return None
     for font in font_manager.findSystemFonts(font_dir):
         font_manager.fontManager.addfont(font)
+    _font_dirs.add(font_dir)
     return None
 
 def set_params(plot_style, plot_type = 'glassnode', font_scale = 1.5, linewidth = 2.5, title_color = '#cc9933', font = 'Legacy Sans ITC Pro', image_scale = 1, size = 8, aspect = 2,  **kws):
-    """Function stylizes plot paramaters according to Leavenworth theme defaults."""
+    """Function stylizes plot paramaters according to Leavenworth theme defaults. In batch mode the theme is only applied when it changes"""
+
+    global _theme
+    key = (plot_style, plot_type, font_scale, linewidth, font, tuple(sorted(kws.items())))
+    if _batch and _theme == key:
+        return dict(title_color = title_color, font = font, title_font = font, image_scale = image_scale, size = size, aspect = aspect)
+    _theme = key
 
     from seaborn import set_context
     sns.set(font=font)
@@ -64,6 +83,101 @@ def set_params(plot_style, plot_type = 'glassnode', font_scale = 1.5, linewidth
     sns.set_palette(sns.color_palette(colors))
     return(params)
 
+def _subplots(figsize):
+    """plt.subplots() replacement, in batch mode one figure per process is cleared and reused"""
+    global _figure
+    if not _batch:
+        return plt.subplots(figsize = figsize)
+    if _figure is None or not plt.fignum_exists(_figure.number):
+        _figure = plt.figure()
+    _figure.clf()
+    _figure.patch.set_facecolor(plt.rcParams['figure.facecolor'])
+    _figure.set_size_inches(figsize)
+    plt.figure(_figure.number)
+    return _figure, _figure.add_subplot()
+
+def batch_mode(enable = True):
+    """Switch batch rendering on or off. Batch mode draws on the Agg backend, applies the theme once and reuses one figure"""
+    global _batch, _theme, _figure
+    _batch = enable
+    _theme = None
+    if enable:
+        plt.switch_backend('agg')
+    elif _figure is not None:
+        plt.close(_figure)
+        _figure = None
+    return None
+
+def _render(job):
+    plot, path = job['plot'], job['filename']
+    result = globals()[plot](*job.get('args', ()), **job.get('kwargs', {}))
+    f = result[0]
+    f.savefig(path, dpi = job.get('dpi', 100), facecolor = f.get_facecolor(), bbox_inches = 'tight')
+    if not _batch:
+        plt.close(f)
+    return str(path)
+
+def render_batch(jobs, out_dir = '.', processes = None, dpi = 100):
+    """
+    Renders many charts to image files, in parallel across a process pool
+    Required arguments:
+        jobs: list of dicts with keys plot (name of a plot function in this module), filename, and optionally args and kwargs
+    Optional arguments:
+        out_dir: directory filenames are relative to
+        processes: number of worker processes, defaults to the number of CPUs. Use 1 to render in this process
+    Typical usage:
+        jobs = [dict(plot = 'glassnode_plot', filename = 'mvrv.png', args = (mvrv,), kwargs = dict(price = price, plot_style = 'mailchimp'))]
+        render_batch(jobs, out_dir = 'newsletter')
+    Returns the list of written paths
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents = True, exist_ok = True)
+    jobs = [dict(job, filename = out_dir/job['filename'], dpi = job.get('dpi', dpi)) for job in jobs]
+    if processes == 1:
+        backend = plt.get_backend()
+        batch_mode(True)
+        try:
+            return [_render(job) for job in jobs]
+        finally:
+            batch_mode(False)
+            plt.switch_backend(backend)
+    with ProcessPoolExecutor(max_workers = processes, initializer = batch_mode) as pool:
+        return list(pool.map(_render, jobs, chunksize = max(1, len(jobs)//(8*(processes or os.cpu_count() or 1)))))
+
+def decimate_series(data, buckets):
+    """
+    Reduces a long Series to at most 2 points per bucket (the minimum and the maximum of each of buckets equal slices) plus the end points.
+    Peaks and troughs survive, so a line drawn at one bucket per pixel column looks the same as the full series.
+    For a DataFrame the rows holding the extremes of any column are kept
+    """
+    n = len(data)
+    if not buckets or n <= 2*buckets:
+        return data
+    size = -(-n//buckets)
+    columns = data.to_numpy(dtype = float).reshape(n, -1)
+    values = np.full((buckets*size, columns.shape[1]), np.nan)
+    values[:n] = columns
+    values = values.reshape(buckets, size, -1)
+    missing = np.isnan(values)
+    lo = np.where(missing, np.inf, values).argmin(axis = 1)
+    hi = np.where(missing, -np.inf, values).argmax(axis = 1)
+    offsets = (np.arange(buckets)*size)[:, None]
+    keep = np.unique(np.concatenate([[0, n - 1], (offsets + lo).ravel(), (offsets + hi).ravel()]))
+    return data.iloc[keep[keep < n]]
+
+def _lineplot(ax, data, **kwargs):
+    """Draw a line straight through matplotlib when there is nothing for seaborn to aggregate. DataFrames get one line per column, colored from colors"""
+    if isinstance(data, pd.Series) and data.index.is_unique:
+        ax.plot(data.index, data.to_numpy(), **kwargs)
+        return ax
+    if isinstance(data, pd.DataFrame) and data.index.is_unique:
+        colors = kwargs.pop('colors', None) or lc_colors
+        for k, column in enumerate(data.columns):
+            label = ' '.join(map(str, column)) if isinstance(column, tuple) else str(column)
+            ax.plot(data.index, data.iloc[:, k].to_numpy(dtype = float), label = label, color = colors[k % len(colors)], **kwargs)
+        return ax
+    return sns.lineplot(data = data, ax = ax, **kwargs)
+
 def whiten_grid(f, ax):
     """Override exiting facecolors on plots and whiten plot area"""
     f.patch.set_facecolor((1,1,1))
@@ -77,8 +191,8 @@ def stylize_spines(ax, color = '#2e4959', lw = 4):
     ax.spines.top.get_bounds()
     return None
 
-def glassnode_plot(data, plot_style = 'leavenworth', price = None, ylabel = None, yaxis = 'linear', rolling = None, linecolor = '#cc9933', percent = False, price_percent = False, dual_plot = True, price_axis = 'log', price_alpha = 1, currency = 'BTC', size = 8, aspect = 2, image_scale = 1, whiten = True, grid = True, price_grid = False, price_lw = 1.5, price_lc = lc_colors[0], start_date = None, price_plot = False, price_label = None, log_formatter = True, title = None, style = 'line', title_loc = 'left', title_fs = 24, stylize = True, lw = 4):
-    """Basic setup for Glassnode data plots"""
+def glassnode_plot(data, plot_style = 'leavenworth', price = None, ylabel = None, yaxis = 'linear', rolling = None, linecolor = '#cc9933', percent = False, price_percent = False, dual_plot = True, price_axis = 'log', price_alpha = 1, currency = 'BTC', size = 8, aspect = 2, image_scale = 1, whiten = True, grid = True, price_grid = False, price_lw = 1.5, price_lc = lc_colors[0], start_date = None, price_plot = False, price_label = None, log_formatter = True, title = None, style = 'line', title_loc = 'left', title_fs = 24, stylize = True, lw = 4, decimate = True):
+    """Basic setup for Glassnode data plots. data is a Series, or a DataFrame (e.g. from glassnode_panel) drawn as one line per column with a legend. Long line series are reduced with decimate_series() before drawing: decimate = True sizes the buckets to the figure width in pixels, an int sets the number of buckets and False plots every point"""
     if plot_style == 'leavenworth':
         params = set_params('leavenworth', plot_type = 'glassnode')
     elif plot_style == 'mailchimp':
@@ -94,15 +208,23 @@ def glassnode_plot(data, plot_style = 'leavenworth', price = None, ylabel = None
         data = data.loc[start_date:]
         if dual_plot:
             price = price.loc[start_date:]
-    f, ax = plt.subplots(figsize = (aspect*image_scale*size,image_scale*size))
+    f, ax = _subplots((aspect*image_scale*size,image_scale*size))
     if rolling:
         data = data.rolling(rolling).mean()
         if percent:
             data = data*100
     else:
         pass
-    if style == 'line':
-        ax = sns.lineplot(data = data, color = linecolor)
+    if style == 'line' and decimate:
+        buckets = decimate if decimate is not True else int(aspect*image_scale*size*f.dpi)
+        data = decimate_series(data, buckets)
+        if dual_plot:
+            price = decimate_series(price, buckets)
+    if style == 'line' and isinstance(data, pd.DataFrame):
+        ax = _lineplot(ax, data, colors = [linecolor] + [c for c in lc_colors if c != linecolor])
+        ax.legend(frameon = False)
+    elif style == 'line':
+        ax = _lineplot(ax, data, color = linecolor)
     elif style == 'bar':        
         ax = sns.barplot(data = data.reset_index(), x = 't', y = data.name)
     else:
@@ -124,7 +246,7 @@ def glassnode_plot(data, plot_style = 'leavenworth', price = None, ylabel = None
     ax.grid(grid)
     if dual_plot:
         ax1 = ax.twinx()
-        ax1 = sns.lineplot(data = price, color = price_lc, linewidth = price_lw, alpha = price_alpha)
+        ax1 = _lineplot(ax1, price, color = price_lc, linewidth = price_lw, alpha = price_alpha)
         if price_percent:
             ax1.yaxis.set_major_formatter(mtick.PercentFormatter())
         if price_axis == 'log':
@@ -171,7 +293,7 @@ def fng_plot(df, plot_style = 'leavenworth', size = 8, aspect = 2, image_scale =
         params = set_params('leavenworth', plot_type = 'glassnode')
     else:
         params = set_params('dark')
-    f, ax = plt.subplots(figsize = (aspect*image_scale*size,image_scale*size))
+    f, ax = _subplots((aspect*image_scale*size,image_scale*size))
     ax = sns.lineplot(data = df, y = 'VALUE', x = 'TIMESTAMP', color = linecolor)
     if whiten:
         whiten_grid(f, ax)
@@ -194,7 +316,7 @@ def performance_plot(data, plot_style = 'leavenworth', x = 'YTD', size = 4, aspe
     else:
         params = set_params('dark')
     
-    f, ax = plt.subplots(figsize = (aspect*image_scale*size,image_scale*size))
+    f, ax = _subplots((aspect*image_scale*size,image_scale*size))
     ax = sns.barplot(data = data, x = x, y = 'RETURN', hue = 'TICKER')
     ax.yaxis.set_major_formatter(mtick.PercentFormatter())
     if 'MONTH' in data.columns.tolist():
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# pandas 2.2 renamed the period end resample aliases
+if tuple(int(v) for v in pd.__version__.split('.')[:2]) >= (2, 2):
+    _resample_rules = {'month': 'ME', 'quarter': 'QE', 'year': 'YE'}
+else:  # pragma: no cover
+    _resample_rules = {'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+def _as_array(df):
+    return np.asarray(df, dtype = float)
+
+def price_ratio(a, log = False):
+    """This routine returns a[t]/a[t-1] (or its log) for every column of the 2-D array a. The first row is NaN"""
+    a = _as_array(a)
+    out = np.empty_like(a)
+    out[:1] = np.nan
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        np.divide(a[1:], a[:-1], out = out[1:])
+        if log:
+            np.log(out[1:], out = out[1:])
+    return out
+
+def simple_returns(a):
+    """This routine returns the period over period change a[t]/a[t-1] - 1 for every column of the 2-D array a"""
+    out = price_ratio(a)
+    out[1:] -= 1
+    return out
+
+def cumulative_returns(r):
+    """This routine compounds the returns r column by column. Missing returns are skipped and stay NaN, like DataFrame.cumprod"""
+    r = _as_array(r)
+    missing = np.isnan(r)
+    out = np.cumprod(np.where(missing, 1.0, 1.0 + r), axis = 0)
+    out -= 1
+    out[missing] = np.nan
+    return out
+
+def rolling_stat(a, window, method = 'mean'):
+    """
+    This routine computes a rolling mean or sample std over window rows for every column of the 2-D array a.
+    Windows holding any NaN or infinite value are NaN, matching DataFrame.rolling(window).mean()/.std()
+    """
+    if method not in ['mean', 'std']:
+        raise Exception('Unknown method. Allowed methods are mean and std')
+    a = _as_array(a)
+    squeeze = a.ndim == 1
+    if squeeze:
+        a = a[:, None]
+    n = a.shape[0]
+    out = np.full(a.shape, np.nan)
+    if window > n:
+        return out[:, 0] if squeeze else out
+    if method == 'std':
+        # Running sums of squares lose precision on trending series, pandas updates the centred sums per window instead
+        out = pd.DataFrame(a).rolling(window).std().to_numpy(copy = True)
+        return out[:, 0] if squeeze else out
+    # Infinite values are masked like NaN so they drop out of the running sums once they leave the window
+    valid = np.isfinite(a)
+    x = np.where(valid, a, 0.0)
+
+    def window_sum(v):
+        c = np.zeros((n + 1, v.shape[1]))
+        np.cumsum(v, axis = 0, out = c[1:])
+        return c[window:] - c[:-window]
+
+    full = window_sum(valid.astype(float)) == window
+    out[window - 1:] = np.where(full, window_sum(x)/window, np.nan)
+    return out[:, 0] if squeeze else out
+
+def period_returns(df, period = 'month'):
+    """
+    This routine returns rounded returns for all columns of a price DataFrame in one vectorized pass.
+    Supported periods are day, month, quarter, year and inception
+    """
+    if period in _resample_rules:
+        df = df.resample(_resample_rules[period]).last()
+        r = simple_returns(df)
+    elif period == 'day':
+        r = simple_returns(df)
+    elif period == 'inception':
+        r = cumulative_returns(simple_returns(df))
+    else:
+        raise Exception('Invalid period.')
+    return pd.DataFrame(r.round(4), index = df.index, columns = df.columns)
@@ -0,0 +1,62 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Defaults used by every data source. Change them with configure()
+settings = {
+    'timeout': (5, 60),  # (connect, read) seconds
+    'retries': 5,
+    'backoff_factor': 0.5,  # sleeps 0.5, 1, 2, 4... seconds between retries
+    'status_forcelist': (429, 500, 502, 503, 504),
+    'pool_connections': 16,  # number of hosts to keep a pool for
+    'pool_maxsize': 16,  # keep-alive connections per host
+}
+
+_session = None
+_lock = threading.Lock()
+
+def configure(**kwargs):
+    """This routine overrides transport settings, e.g. configure(timeout = 30, retries = 3). The shared session is rebuilt on next use"""
+    global _session
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise Exception(f'Unknown transport settings {sorted(unknown)}. Supported settings are {sorted(settings)}')
+    with _lock:
+        settings.update(kwargs)
+        if _session is not None:
+            _session.close()
+        _session = None
+    return settings
+
+def _build_session():
+    retry = Retry(
+        total = settings['retries'],
+        backoff_factor = settings['backoff_factor'],
+        status_forcelist = settings['status_forcelist'],
+        allowed_methods = frozenset(['GET']),
+        respect_retry_after_header = True,
+        # Hand the last response back to the caller once retries are exhausted so it can report the status code
+        raise_on_status = False,
+    )
+    adapter = HTTPAdapter(pool_connections = settings['pool_connections'], pool_maxsize = settings['pool_maxsize'], max_retries = retry)
+    s = requests.Session()
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    s.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    return s
+
+def session():
+    """This routine returns the process wide requests.Session shared by all data sources"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def get(url, params = None, headers = None, timeout = None):
+    """GET url through the shared keep-alive session, retrying 429/5xx responses with exponential backoff"""
+    if timeout is None:
+        timeout = settings['timeout']
+    return session().get(url, params = params, headers = headers, timeout = timeout)
@@ -1,4 +1,4 @@
-import requests
+from . import transport
 import pandas as pd
 from .helpers import configure_api_keys, validate_date
 from datetime import datetime, timedelta
@@ -16,6 +16,12 @@ def bitvol(start_date = ly_date, end_date = today, currency = 'BTC'):
             start_date = date from 1 year ago
             end_date = today's date
     """
+    url, headers = _request(start_date, end_date, currency)
+    response = transport.get(url, headers = headers)
+    return _frame(response)
+
+def _request(start_date, end_date, currency):
+    """Validate the inputs and return the url and headers of a bitvol request"""
     if currency.upper() not in ["BTC", "ETH"]:
         raise Exception('Invalid currency. Supported values are BTC and ETH')
     try:
@@ -35,7 +41,9 @@ def bitvol(start_date = ly_date, end_date = today, currency = 'BTC'):
     'x-rapidapi-key': key
     }
     url = url+start_date+'/'+end_date
-    response = requests.request("GET", url, headers = headers)
+    return url, headers
+
+def _frame(response):
     s = response.json()
     df = pd.DataFrame.from_dict(s[0])
     df['datetime'] = pd.to_datetime(df.datetime)
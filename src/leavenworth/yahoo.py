@@ -1,68 +1,133 @@
 import yfinance as yf
 import pandas as pd
 import janitor
-import numpy as np
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .returns import period_returns, price_ratio, rolling_stat
+from .cache import cache_key, read_cache, write_cache, merge_tail
 
 now = datetime.now()
 start_date = now.date().replace(year=now.year -1,month=1, day=1).strftime('%Y-%m-%d')
 
-def _returns(df, t, period = 'month'):
-    if period == 'day':
-        s = (df[t].pct_change()).round(4)
-    elif period == 'month':
-        s = (df.resample('M').last()[t].pct_change()).round(4)
-    elif period == 'quarter':
-        s = (df.resample('Q').last()[t].pct_change()).round(4)
-    elif period == 'year':
-        s = (df.resample('Y').last()[t].pct_change()).round(4)
-    elif period == 'inception':
-        s = (((df[t].pct_change())+1).cumprod()-1).round(4)
-    else:
-        raise Exception('Invalid period.')
-    return s
-
-def _dr(df, t, period = 60, method = 'mean', log = False, percent = True):
-    if log:
-        s =  np.log(df[t].div(df[t].shift(1)))
-    else:
-        s =  (df[t].div(df[t].shift(1)))
-    if method == 'mean':
-        s = s.rolling(period).mean()
-    elif method == 'std':
-        s = s.rolling(period).std()
-    else:
-        raise Exception('Unknown method. Allowed methods are mean and std')
+def daily_returns(df, period = 60, method = 'mean', log = False, percent = True):
+    """Rolling mean or std of daily price ratios (log ratios if log = True) over period days, for all tickers at once"""
+    r = rolling_stat(price_ratio(df, log = log), period, method = method)
     if percent:
-        return s*100
+        r *= 100
+    return pd.DataFrame(r, index = df.index, columns = df.columns)
+
+def _history(ticker, period = '1y', debug = False):
+    if debug:
+        print('Pulling Ticker %s'%ticker)
+    h = yf.Ticker(ticker).history(period = period)
+    h['TICKER'] = ticker
+    return h
+
+def _pivot_close(price):
+    """Pivot long OHLCV rows (DATE, TICKER, CLOSE...) into a forward filled DATE x TICKER frame of close prices"""
+    price = price.drop_duplicates(subset = ['DATE', 'TICKER'], keep = 'last')
+    return price.pivot(index = 'DATE', columns = 'TICKER', values = 'CLOSE').ffill()
+
+def yahoo(tickers, period = '1y', debug = False, pivot = True, max_workers = 8):
+    """
+    Pulls price history for tickers from Yahoo Finance, max_workers tickers at a time
+    Typical usage:
+        df = yahoo(['SPY', 'QQQ', 'GLD'])
+        df = yahoo(sp500().SYMBOL.tolist(), period = '5y', max_workers = 16)
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        frames = list(pool.map(lambda t: _history(t, period = period, debug = debug), tickers))
+    # Concatenate once rather than growing a frame per ticker
+    price = pd.concat(frames).reset_index().clean_names(case_type = 'upper')
+    if pivot:
+        return _pivot_close(price)
     else:
-        return s
+        return price
+   
+# Earliest date covered by each yfinance period, relative to today
+_period_offsets = {
+    '1d': pd.DateOffset(days = 1), '5d': pd.DateOffset(days = 5),
+    '1mo': pd.DateOffset(months = 1), '3mo': pd.DateOffset(months = 3), '6mo': pd.DateOffset(months = 6),
+    '1y': pd.DateOffset(years = 1), '2y': pd.DateOffset(years = 2), '5y': pd.DateOffset(years = 5), '10y': pd.DateOffset(years = 10),
+}
 
-def daily_returns(df, period = 60, method = 'mean', log = False, percent = True):
-    dr = pd.DataFrame()
-    tickers = df.columns.tolist()
-    for ticker in tickers:
-        s = _dr(df, ticker, period = period, method = method, log = log, percent = percent)
-        dr[ticker] = s
-    return(dr)
+def _period_start(period):
+    today = pd.Timestamp.now().normalize()
+    if period == 'max':
+        return pd.Timestamp('1900-01-01')
+    if period == 'ytd':
+        return today.replace(month = 1, day = 1)
+    if period not in _period_offsets:
+        raise Exception('Invalid period. Supported values are %s, ytd and max'%', '.join(_period_offsets))
+    return today - _period_offsets[period]
+
+def _since(h, start):
+    """Rows of h on or after the naive date start, h may have a tz-aware index"""
+    if h.index.tz is not None:
+        start = start.tz_localize(h.index.tz)
+    return h[h.index >= start]
 
-def yahoo(tickers, period = '1y', debug = False, pivot = True):
-    price = pd.DataFrame()
-    for ticker in tickers:
+def _stored_history(ticker, period, store_index, debug = False):
+    """Return the full stored history of ticker, pulling only what the store is missing. Also returns the start date the store now covers"""
+    key = cache_key('yahoo', ticker)
+    cached = read_cache(key)
+    start = _period_start(period)
+    if cached is None or len(cached) == 0 or ticker not in store_index.index or store_index.loc[ticker, 'START'] > start:
         if debug:
-            print('Pulling Ticker %s'%ticker)
-        s = yf.Ticker(ticker)
-        h = s.history(period = period)
+            print('Pulling Ticker %s for period %s'%(ticker, period))
+        h = yf.Ticker(ticker).history(period = period)
+        covered = start
+    else:
+        last = cached.index[-1]
+        if debug:
+            print('Pulling Ticker %s since %s'%(ticker, last.date()))
+        # The last stored bar is pulled again in case it was still in progress when stored
+        tail = yf.Ticker(ticker).history(start = last.strftime('%Y-%m-%d'))
+        h = merge_tail(cached, tail)
+        covered = store_index.loc[ticker, 'START']
+    if len(h):
+        write_cache(key, h)
+    return h, covered
+
+def yahoo_store(tickers, period = '1y', debug = False, pivot = True, max_workers = 8):
+    """
+    Same output as yahoo() but backed by a local price store (one file per ticker, see leavenworth.cache).
+    Only bars after the last stored date are downloaded, unless period reaches further back than the store
+    Typical usage:
+        df = yahoo_store(['SPY', 'QQQ', 'GLD'], period = '5y')
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    # START is the earliest date each ticker's stored history is complete from
+    store_index = read_cache('yahoo_index')
+    if store_index is None:
+        store_index = pd.DataFrame({'START': pd.Series(dtype = 'datetime64[ns]')})
+        store_index.index.name = 'TICKER'
+    else:
+        store_index = store_index[['START']]
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        results = list(pool.map(lambda t: _stored_history(t, period, store_index, debug = debug), tickers))
+    start = _period_start(period)
+    frames = []
+    for ticker, (h, covered) in zip(tickers, results):
+        if len(h) == 0:
+            print('WARNING: no data returned for %s'%ticker)
+            continue
+        store_index.loc[ticker, 'START'] = covered
+        h = _since(h, start).copy()
         h['TICKER'] = ticker
-        price = price.append(h)
-    price = price.reset_index().clean_names(case_type = 'upper')
+        frames.append(h)
+    write_cache('yahoo_index', store_index)
+    if not frames:
+        return pd.DataFrame()
+    price = pd.concat(frames).reset_index().clean_names(case_type = 'upper')
     if pivot:
-        pivot = price.reset_index().pivot_table(index = 'DATE', columns = 'TICKER', values = 'CLOSE', aggfunc = 'mean')
-        pivot = pivot.fillna(method = 'pad')
-        return pivot
+        return _pivot_close(price)
     else:
         return price
-   
+
 def prep_returns(df, period = 'month', fix_resample = True):
     """Typical usage:
     >>> prep_returns(data, period = 'inception')
@@ -70,29 +135,25 @@ def prep_returns(df, period = 'month', fix_resample = True):
     >>> prep_returns(data, period = 'day')
     Other supported periods are month (default), year (for YTD), and quarter
     """
-    r = pd.DataFrame()
-    tickers = df.columns.tolist()
-    for ticker in tickers:
-        s = _returns(df, ticker, period = period)
-        r[ticker] = s
+    r = period_returns(df, period = period)
     r = r.reset_index()
     # Fix resample fields
     if fix_resample:
         if period == 'month':
-            r['MONTH'] = r.DATE.apply(lambda x: x.strftime("%Y-%b"))
+            r['MONTH'] = r.DATE.dt.strftime("%Y-%b")
         elif period == 'year':
             r = r.dropna().tail(1)
             r = r.rename_column('DATE', 'YTD')
             r = r.clean_names(case_type = 'upper')
-            r.loc[r.index.values[0], 'YTD'] = 'YTD'
+            r['YTD'] = 'YTD'
             r = r.set_index('YTD')
         elif period == 'inception':
             r = r.dropna().tail(1)
             r = r.rename_column('DATE', 'INCEPTION')
             r = r.clean_names(case_type = 'upper')
-            r.loc[r.index.values[0], 'INCEPTION'] = 'INCEPTION'
+            r['INCEPTION'] = 'INCEPTION'
             r = r.set_index('INCEPTION')            
-        elif period == 'quarter':
+        elif period in ['quarter', 'day']:
             pass
         else:
             raise Exception('Incorrect period')
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from leavenworth import aio, coinalyze, transport  # noqa: E402
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.server.hits[path] = self.server.hits.get(path, 0) + 1
+        status, headers = 200, {}
+        if path == "/flaky" and self.server.hits[path] < 3:
+            status, headers = 503, {"Retry-After": "0"}
+        elif path == "/down":
+            status = 502
+        body = json.dumps({"path": path}).encode()
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits = {}
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setitem(transport.settings, "backoff_factor", 0.01)
+    monkeypatch.setitem(transport.settings, "retries", 2)
+    yield httpd, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await aio.aclose()
+
+    return asyncio.run(main())
+
+
+def test_get_retries_and_honours_retry_after(server):
+    httpd, url = server
+    r = _run(aio.get(url + "/flaky"))
+    assert r.status_code == 200 and httpd.hits["/flaky"] == 3
+    # Once retries are exhausted the last response is handed back
+    r = _run(aio.get(url + "/down"))
+    assert r.status_code == 502 and httpd.hits["/down"] == 3
+
+
+class _Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_retry_after_parsing():
+    assert aio._retry_after(_Response({"Retry-After": "7"})) == 7.0
+    assert aio._retry_after(_Response({"Retry-After": "-3"})) == 0.0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < aio._retry_after(_Response({"Retry-After": later})) <= 30
+    assert aio._retry_after(_Response({"Retry-After": "soon"})) is None
+    assert aio._retry_after(_Response({})) is None
+
+
+def test_async_rate_limiter_spaces_calls():
+    limiter = aio.AsyncRateLimiter(2, period=0.2)
+
+    async def burst():
+        t = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(3)])
+        return time.monotonic() - t
+
+    assert asyncio.run(burst()) >= 0.19
+    # The limiter keeps working from another event loop
+    assert asyncio.run(burst()) >= 0.19
+
+
+
+def test_coinalyze_budget_is_shared_with_the_blocking_api(monkeypatch):
+    assert aio.coinalyze_limiter.limiter is coinalyze.rate_limiter
+    limiter = aio.RateLimiter(2, 0.2)
+    monkeypatch.setattr(aio, "coinalyze_limiter", aio.AsyncRateLimiter(shared=limiter))
+    limiter.acquire()
+    limiter.acquire()
+    t = time.monotonic()
+    asyncio.run(aio.coinalyze_limiter.acquire())
+    assert time.monotonic() - t >= 0.15
+    assert aio.coinalyze_limiter.calls == 2
+
+def test_client_is_rebound_per_loop_and_old_one_closed(server):
+    _, url = server
+
+    async def fetch():
+        await aio.get(url + "/a")
+        return aio.client()
+
+    first = asyncio.run(fetch())
+    second = asyncio.run(fetch())
+    assert first is not second
+    assert first.is_closed
+    _run(aio.aclose())
+    assert aio._client is None
+
+
+def test_history_fan_out_matches_blocking_shape(monkeypatch):
+    async def fake(endpoint, params=None):
+        return [{"symbol": s, "history": [{"t": params["from"], "v": 1.0}]} for s in params["symbols"].split(",")]
+
+    monkeypatch.setattr(aio, "api_call", fake)
+    monkeypatch.setattr(coinalyze, "chunk_points", 10)
+    df = asyncio.run(aio.oi_history("A,B", start_date="2024-01-01", end_date="2024-02-01"))
+    assert sorted(df.index.unique()) == ["A", "B"]
+    assert not df.reset_index().duplicated(["symbol", "t"]).any()
+
+
+def test_glassnode_checks_assets_like_the_blocking_path():
+    with pytest.raises(Exception, match="only available for ETH"):
+        asyncio.run(aio.glassnode("ETH_STAKED", currency="BTC"))
@@ -0,0 +1,203 @@
+import time
+
+import pandas as pd
+import pytest
+
+from leavenworth import coinalyze
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def _fake_history(endpoint, params=None):
+    """Stand-in for api_call returning one bar per minute of the requested window"""
+    start = params["from"] + (-params["from"]) % 60
+    bars = [{"t": t, "v": 1.0} for t in range(start, params["to"] + 1, 60)]
+    return [{"symbol": s, "history": bars} for s in params["symbols"].split(",")]
+
+
+def test_chunk_window():
+    chunks = coinalyze.chunk_window(0, 250 * 60, "1min", max_points=100)
+    assert chunks == [(0, 6000), (6000, 12000), (12000, 15000)]
+    assert coinalyze.chunk_window(0, 60, "daily") == [(0, 60)]
+
+
+def test_period_parsing():
+    start, end = coinalyze.get_unix_timestamps_from_period("2w")
+    assert 14 * 86400 <= end - start < 15 * 86400
+    with pytest.raises(Exception):
+        coinalyze.get_unix_timestamps_from_period("fortnight")
+
+
+def test_history_is_chunked_and_deduplicated(monkeypatch):
+    monkeypatch.setattr(coinalyze, "api_call", _fake_history)
+    monkeypatch.setattr(coinalyze, "chunk_points", 500)
+    df = coinalyze.oi_history(
+        symbols="A,B", interval="1min", start_date="2024-01-01", end_date="2024-01-02"
+    )
+    assert len(df) == 2 * (24 * 60 + 1)
+    assert not df.reset_index().duplicated(["symbol", "t"]).any()
+    assert df.loc["A", "t"].is_monotonic_increasing
+
+
+def test_batch_symbols():
+    symbols = ",".join(f"S{i}" for i in range(45)) + ",S0"
+    batches = coinalyze.batch_symbols(symbols)
+    assert [len(b.split(",")) for b in batches] == [20, 20, 5]
+    assert coinalyze.batch_symbols(["A", "B", "C"], size=2) == ["A,B", "C"]
+
+
+def test_snapshot_is_batched(monkeypatch):
+    calls = []
+
+    def fake(endpoint, params=None):
+        calls.append(params["symbols"])
+        return [{"symbol": s, "value": 0.01, "update": 1700000000000} for s in params["symbols"].split(",")]
+
+    monkeypatch.setattr(coinalyze, "api_call", fake)
+    df = coinalyze.current_funding_rate([f"S{i}" for i in range(30)])
+    assert len(calls) == 2
+    assert len(df) == 30
+
+
+def test_snapshot_poller_keeps_only_changes(monkeypatch):
+    updates = iter([{"A": 1, "B": 1}, {"A": 1, "B": 2}, {"A": 3, "B": 2}])
+
+    def fake(endpoint, params=None):
+        current = next(updates)
+        return [{"symbol": s, "value": float(u), "update": 1700000000000 + u * 1000} for s, u in current.items()]
+
+    monkeypatch.setattr(coinalyze, "api_call", fake)
+    poller = coinalyze.SnapshotPoller("funding_rate", "A,B", every=0, maxlen=3)
+    changed = list(poller.stream(polls=3))
+    assert [len(c) for c in changed] == [2, 1, 1]
+    assert [r.symbol for r in poller.buffer] == ["B", "B", "A"]
+    assert poller.latest().to_dict() == {"A": 3.0, "B": 2.0}
+    agg = poller.rolling(window=1.5)
+    assert agg["count"].to_dict() == {"A": 1, "B": 1}
+    assert len(poller.frame()) == 3
+
+
+
+def test_snapshot_poller_window_ignores_poll_order(monkeypatch):
+    now = 1700000000000
+    monkeypatch.setattr(coinalyze, "api_call", lambda endpoint, params=None: [
+        {"symbol": "A", "value": 1.0, "update": now},
+        {"symbol": "B", "value": 2.0, "update": now - 2 * 3600 * 1000},
+    ])
+    poller = coinalyze.SnapshotPoller("oi", "A,B", every=0)
+    list(poller.stream(polls=1))
+    assert poller.frame(window=3600).symbol.tolist() == ["A"]
+    assert poller.rolling(window=3600)["count"].to_dict() == {"A": 1}
+
+
+def test_history_from_start_date_runs_up_to_now():
+    before = int(time.time())
+    params = coinalyze._history_params("A", "daily", None, "2024-01-01", None)
+    assert params[0]["from"] == coinalyze.get_unix_timestamps("2024-01-01", "2024-01-01")[0]
+    assert before <= params[-1]["to"] <= int(time.time())
+    fixed = coinalyze._history_params("A", "daily", None, "2024-01-01", "2024-02-01")
+    assert fixed[-1]["to"] == coinalyze.get_unix_timestamps("2024-01-01", "2024-02-01")[1]
+
+def test_time_unit_by_magnitude():
+    assert coinalyze.time_unit([1700000000, 1700000060]) == "s"
+    assert coinalyze.time_unit([1700000000000]) == "ms"
+    with pytest.raises(ValueError):
+        coinalyze.time_unit([1700000000000000])
+
+
+def test_flatten_history_handles_ragged_records():
+    data = [
+        {"symbol": "A", "history": []},
+        {"symbol": "B", "history": [{"t": 1700000000, "o": 1.0}, {"t": 1700000060, "c": 2.0}]},
+    ]
+    df = coinalyze.to_df(data, flatten=True)
+    assert list(df.columns) == ["t", "o", "c"]
+    assert df.index.tolist() == ["B", "B"]
+    assert df["c"].isna().tolist() == [True, False]
+
+
+def test_snapshot_poller_thread_survives_failed_polls(monkeypatch):
+    polls = []
+
+    def fake(endpoint, params=None):
+        polls.append(endpoint)
+        if len(polls) == 2:
+            raise Exception("Error calling coinalyze.io API: Return status code is 502")
+        return [{"symbol": "A", "value": 0.01, "update": 1700000000000 + len(polls)}]
+
+    monkeypatch.setattr(coinalyze, "api_call", fake)
+    received = []
+    poller = coinalyze.SnapshotPoller("oi", "A", every=0.01).start(callback=received.append)
+    deadline = time.monotonic() + 5
+    while len(polls) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert poller.is_alive()
+    poller.stop()
+    assert not poller.is_alive()
+    assert len(polls) >= 4
+    assert poller.errors == 1 and "502" in str(poller.last_error)
+    assert len(received) == len(polls) - 1
+
+
+EXCHANGES = [{"name": "Binance", "code": "A"}, {"name": "BitMEX", "code": "0"}, {"name": "Other", "code": "Z"}]
+MARKETS = [
+    {"symbol": "BTCUSDT_PERP.A", "exchange": "A", "base_asset": "BTC", "quote_asset": "USDT", "is_perpetual": True},
+    {"symbol": "BTCUSD_PERP.0", "exchange": "0", "base_asset": "BTC", "quote_asset": "USD", "is_perpetual": True},
+    {"symbol": "ETHUSDT_PERP.A", "exchange": "A", "base_asset": "ETH", "quote_asset": "USDT", "is_perpetual": True},
+    {"symbol": "BTCUSDT.Z", "exchange": "Z", "base_asset": "BTC", "quote_asset": "USDT", "is_perpetual": False},
+]
+
+
+@pytest.fixture
+def reference(monkeypatch, tmp_path):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    monkeypatch.setattr(coinalyze, "_meta", {})
+    calls = []
+
+    def fake(endpoint, params=None):
+        calls.append(endpoint)
+        return {"/exchanges": EXCHANGES, "/future-markets": MARKETS}[endpoint]
+
+    monkeypatch.setattr(coinalyze, "api_call", fake)
+    return calls
+
+
+def test_reference_tables_are_cached_in_memory_and_on_disk(reference):
+    ex = coinalyze.exchange_meta()
+    assert ex.loc["A", "name"] == "Binance"
+    coinalyze.exchange_meta()
+    assert reference == ["/exchanges"]
+    # Dropping the in-memory copy falls back to the disk cache
+    coinalyze._meta.clear()
+    assert coinalyze.exchange_meta().loc["0", "name"] == "BitMEX"
+    assert reference == ["/exchanges"]
+    # Expired copies are refetched
+    coinalyze.exchange_meta(ttl=0)
+    assert reference == ["/exchanges", "/exchanges"]
+    coinalyze.refresh_meta()
+    coinalyze.market_meta()
+    assert reference.count("/future-markets") == 1
+
+
+def test_symbol_info_index(reference):
+    info = coinalyze.symbol_info("BTCUSD_PERP.0")
+    assert info == coinalyze.SymbolInfo("BitMEX", "BTC", "USD", True)
+    assert coinalyze.symbol_info("NOT_LISTED") is None
+    coinalyze.symbol_info("ETHUSDT_PERP.A")
+    assert reference.count("/future-markets") == 1
+
+
+def test_merge_meta_joins_market_and_exchange_columns(reference):
+    snapshot = pd.DataFrame(
+        {"symbol": ["BTCUSDT_PERP.A", "BTCUSD_PERP.0", "ETHUSDT_PERP.A", "BTCUSDT.Z"], "value": [1.0, 2.0, 3.0, 4.0]}
+    )
+    df = coinalyze.merge_meta(snapshot)
+    assert df.symbol.tolist() == ["BTCUSDT_PERP.A", "BTCUSD_PERP.0"]
+    assert df.name.tolist() == ["Binance", "BitMEX"]
+    assert {"value", "exchange", "base_asset", "quote_asset", "is_perpetual", "code"} <= set(df.columns)
+    assert df.columns[0] == "name"
+    history = snapshot.set_index("symbol")
+    merged = coinalyze.merge_meta(history)
+    assert merged.index.name == "symbol" and merged.name.tolist() == ["Binance", "BitMEX"]
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from leavenworth import derived
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def _fake_many(calls):
+    def fetch(metrics, currencies=None, since=None, **kwargs):
+        calls.append((list(metrics), since))
+        index = pd.date_range("2020-01-01", periods=400, freq="D")
+        return pd.DataFrame(
+            {m: np.random.default_rng(sum(map(ord, m))).uniform(1, 2, len(index)) for m in metrics}, index=index
+        )
+
+    return fetch
+
+
+def test_base_series_are_fetched_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(derived, "glassnode_many", _fake_many(calls))
+    df = derived.derive(["mvrv", "NUPL", "HASH_RIBBON", "MCAP"])
+    assert len(calls) == 1
+    assert sorted(calls[0][0]) == ["HASH_RATE", "MCAP", "RCAP"]
+    assert list(df.columns) == ["MVRV", "NUPL", "HASH_RIBBON_ma30", "HASH_RIBBON_ma60", "MCAP"]
+    np.testing.assert_allclose(df.NUPL, 1 - 1 / df.MVRV)
+    hash_rate = _fake_many([])(["HASH_RATE"]).HASH_RATE
+    pd.testing.assert_series_equal(
+        df.HASH_RIBBON_ma30, hash_rate.rolling(30).mean(), check_names=False
+    )
+
+
+def test_since_fetches_warm_up_history(monkeypatch):
+    calls = []
+    monkeypatch.setattr(derived, "glassnode_many", _fake_many(calls))
+    df = derived.derive(["SSR_OSC"], since="2020-12-01")
+    assert calls[0][1] == 1606780800 - 200 * 86400
+    assert df.index[0] == pd.Timestamp("2020-12-01")
+    assert df.SSR_OSC.notna().all()
+
+
+def test_unknown_metric():
+    with pytest.raises(Exception, match="Unknown metric"):
+        derived.derive(["NOT_A_METRIC"])
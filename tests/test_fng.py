@@ -0,0 +1,54 @@
+import importlib
+
+import pandas as pd
+
+# leavenworth.fng is also the name of the lazily exported function
+fng_module = importlib.import_module("leavenworth.fng")
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return {"data": self.data}
+
+
+def _fake_api(days, calls):
+    """Stand-in for the API publishing one value per day up to today, newest first"""
+    today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+    rows = [
+        {"value": str(10 + k), "value_classification": "Fear", "timestamp": str(int((today - pd.Timedelta(days=k)).timestamp()))}
+        for k in range(days)
+    ]
+
+    def get(url, params=None, **kwargs):
+        calls.append(params["limit"])
+        return _Response(rows[: params["limit"]] if params["limit"] else rows)
+
+    return get
+
+
+def test_history_is_cached_and_parsed_compactly(monkeypatch, tmp_path):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    calls = []
+    monkeypatch.setattr(fng_module.transport, "get", _fake_api(100, calls))
+    df = fng_module.fng(limit=30, cache=True)
+    assert calls == [0]
+    assert len(df) == 30 and df.TIMESTAMP.is_monotonic_decreasing
+    assert df.VALUE.dtype == "uint8" and df.VALUE.iloc[0] == 10
+    assert isinstance(df.VALUE_CLASSIFICATION.dtype, pd.CategoricalDtype)
+    # Today's value is cached, no new request until the next one is published
+    assert len(fng_module.fng(limit=0, cache=True)) == 100
+    assert calls == [0]
+    # A stale cache only asks for the missing days
+    key = fng_module.cache_key("fng")
+    fng_module.write_cache(key, fng_module.read_cache(key).iloc[:-3])
+    assert len(fng_module.fng(limit=0, cache=True)) == 100
+    assert calls == [0, 5]
@@ -0,0 +1,84 @@
+import pandas as pd
+
+from leavenworth import fred
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def test_cached_series_refreshes_incrementally(monkeypatch, tmp_path):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    calls = []
+    history = pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]))
+
+    def fake(series, observation_start=None, observation_end=None, **kwargs):
+        calls.append(observation_start)
+        return history.loc[observation_start:]
+
+    monkeypatch.setattr(fred, "_fetch_observations", fake)
+    first = fred.fred_data("CPI", cache=True)
+    assert first.tolist() == [1.0, 2.0, 3.0] and calls == [None]
+    # Within cache_ttl the local copy is used as is
+    fred.fred_data("CPI", cache=True)
+    assert len(calls) == 1
+    monkeypatch.setattr(fred, "cache_ttl", 0)
+    history = pd.concat([history.iloc[:2], pd.Series([3.5, 4.0], index=pd.to_datetime(["2024-03-01", "2024-04-01"]))])
+    df = fred.fred_many(["CPI", "CPI"], cache=True, observation_start="2024-02-01")
+    assert calls[1] == pd.Timestamp("2024-03-01")
+    assert df["CPI"].tolist() == [2.0, 3.5, 4.0]
+
+
+def test_cached_series_falls_back_to_cache_when_refresh_fails(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    history = pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-01", "2024-02-01"]))
+    monkeypatch.setattr(fred, "_fetch_observations", lambda series, **kwargs: history)
+    fred.fred_data("CPI", cache=True)
+
+    def failing(series, **kwargs):
+        raise ValueError("Error calling FRED API for series CPI: Return status code is 500")
+
+    monkeypatch.setattr(fred, "_fetch_observations", failing)
+    monkeypatch.setattr(fred, "cache_ttl", 0)
+    assert fred.fred_data("CPI", cache=True).tolist() == [1.0, 2.0]
+    assert "WARNING: could not refresh" in capsys.readouterr().out
+
+
+class _FakeFred:
+    def __init__(self):
+        self.calls = []
+
+    def get_series(self, series, **kwargs):
+        self.calls.append(series)
+        return pd.Series([float(len(series))], index=pd.to_datetime(["2024-01-01"]))
+
+    def get_series_info(self, series):
+        self.calls.append(series)
+        return pd.Series({"id": series, "title": series.lower()})
+
+
+def test_many_without_cache_is_rate_limited(monkeypatch, tmp_path):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    client = _FakeFred()
+    limiter = fred.RateLimiter(120, 60)
+    monkeypatch.setattr(fred, "_fred", client)
+    monkeypatch.setattr(fred, "rate_limiter", limiter)
+    df = fred.fred_many(["VIXCLS", "DGS10", "VIXCLS"])
+    assert sorted(client.calls) == ["DGS10", "VIXCLS"]
+    assert df.columns.tolist() == ["VIXCLS", "DGS10"]
+    assert df.iloc[0].tolist() == [6.0, 5.0]
+    assert len(limiter._times) == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_series_info_is_memoised(monkeypatch):
+    client = _FakeFred()
+    monkeypatch.setattr(fred, "_fred", client)
+    monkeypatch.setattr(fred, "_info", {})
+    info = fred.fred_series_info("VIXCLS")
+    info["title"] = "changed"
+    assert fred.fred_series_info("VIXCLS")["title"] == "vixcls"
+    assert client.calls == ["VIXCLS"]
+    fred.refresh_series_info()
+    fred.fred_series_info("VIXCLS")
+    assert client.calls == ["VIXCLS", "VIXCLS"]
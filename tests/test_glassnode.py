@@ -0,0 +1,79 @@
+import importlib
+
+import pandas as pd
+
+# leavenworth.glassnode is also the name of the lazily exported function
+glassnode_module = importlib.import_module("leavenworth.glassnode")
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def test_panel_has_asset_metric_columns(monkeypatch):
+    calls = []
+
+    def fake(metric, currency="BTC", **kwargs):
+        calls.append((metric, currency))
+        index = pd.date_range("2023-01-01", periods=3 if currency == "BTC" else 4, freq="D")
+        return pd.Series(range(len(index)), index=index, dtype=float)
+
+    monkeypatch.setattr(glassnode_module, "glassnode", fake)
+    df = glassnode_module.glassnode_panel(["exchange_balance", "ETH_STAKED"], ["btc", "ETH"])
+    assert ("ETH_STAKED", "BTC") not in calls
+    assert list(df.columns) == [("BTC", "EXCHANGE_BALANCE"), ("ETH", "EXCHANGE_BALANCE"), ("ETH", "ETH_STAKED")]
+    assert df.columns.names == ["asset", "metric"]
+    assert len(df) == 4
+    assert df.xs("EXCHANGE_BALANCE", axis=1, level="metric").shape == (4, 2)
+
+
+def test_bulk_pulls_share_one_rate_limiter(monkeypatch):
+    limiter = glassnode_module.RateLimiter(60, 60)
+    monkeypatch.setattr(glassnode_module, "rate_limiter", limiter)
+    monkeypatch.setattr(glassnode_module, "glassnode", lambda metric, currency="BTC", **kwargs: pd.Series([1.0]))
+    glassnode_module.glassnode_many(["PRICE", "MVRV"], rate_limit=10)
+    glassnode_module.glassnode_panel(["PRICE"], ["BTC", "ETH"], rate_limit=10)
+    assert limiter.calls == 10
+    assert len(limiter._times) == 4
+
+
+def test_many_flattens_object_valued_metrics(monkeypatch):
+    index = pd.date_range("2023-01-01", periods=2, freq="D")
+
+    def fake(metric, currency="BTC", **kwargs):
+        if metric == "EXCHANGE_BALANCE_STACKED":
+            return pd.DataFrame({"binance": [1.0, 2.0], "coinbase": [3.0, 4.0]}, index=index)
+        return pd.Series([5.0, 6.0], index=index, name="market_price_usd_close")
+
+    monkeypatch.setattr(glassnode_module, "glassnode", fake)
+    df = glassnode_module.glassnode_many(["PRICE", "EXCHANGE_BALANCE_STACKED"], rate_limit=None)
+    assert list(df.columns) == ["PRICE", "EXCHANGE_BALANCE_STACKED_binance", "EXCHANGE_BALANCE_STACKED_coinbase"]
+
+
+def test_currency_is_case_insensitive(monkeypatch):
+    from leavenworth import helpers
+
+    calls = []
+
+    class FakeClient:
+        def get(self, url, a="BTC", **kwargs):
+            calls.append(a)
+            return pd.Series([1.0])
+
+    monkeypatch.setattr(helpers, "glassnode_client", lambda: FakeClient())
+    assert helpers.check_request("ETH_STAKED", "eth").name == "ETH_STAKED"
+    glassnode_module.glassnode("eth_staked", currency="eth")
+    assert calls == ["ETH"]
+
+
+def test_many_fetches_each_metric_once(monkeypatch):
+    calls = []
+
+    def fake(metric, currency="BTC", **kwargs):
+        calls.append((metric, currency))
+        return pd.Series([1.0])
+
+    monkeypatch.setattr(glassnode_module, "glassnode", fake)
+    df = glassnode_module.glassnode_many(["PRICE", "price", "MVRV"], currencies=["btc", "BTC"], rate_limit=None)
+    assert calls == [("PRICE", "BTC"), ("MVRV", "BTC")]
+    assert list(df.columns) == ["PRICE", "MVRV"]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from leavenworth.glassnode_api import parse, to_frame, to_series
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+URL = "https://api.glassnode.com/v1/metrics/supply/profit_relative"
+
+
+def test_to_series_sorts_and_maps_none_to_nan():
+    s = to_series([{"t": 172800, "v": 2}, {"t": 86400, "v": None}], name="x")
+    assert s.index.tolist() == [pd.Timestamp("1970-01-02"), pd.Timestamp("1970-01-03")]
+    assert np.isnan(s.iloc[0]) and s.iloc[1] == 2.0 and s.dtype == "float64"
+
+
+def test_to_frame_flattens_nested_and_ragged_fields():
+    rows = [
+        {"t": 86400, "o": {"a": 1, "b": {"x": 2, "y": 3}}},
+        {"t": 172800, "o": {"a": 4, "c": 5}},
+        {"t": 259200, "o": None},
+        {"t": 345600, "o": {"b": {"x": 6, "z": 7}}},
+    ]
+    df = to_frame(rows, name="m")
+    assert list(df.columns) == ["a", "b_x", "b_y", "b_z", "c"]
+    assert df.columns.name == "m"
+    assert (df.dtypes == "float64").all()
+    assert df.loc["1970-01-05", "b_x"] == 6 and np.isnan(df.loc["1970-01-05", "a"])
+    assert df.loc["1970-01-04"].isna().all()
+
+
+def test_to_frame_dtype_and_object_fallback():
+    rows = [{"t": 86400, "o": {"v": 1.5, "label": "low"}}, {"t": 86400 * 2, "o": {"v": 2.5, "label": "high"}}]
+    df = to_frame(rows, dtype="float32")
+    assert df["v"].dtype == "float32"
+    assert not pd.api.types.is_numeric_dtype(df["label"]) and df["label"].tolist() == ["low", "high"]
+
+
+def test_parse_picks_series_or_frame():
+    assert isinstance(parse(b'[{"t": 86400, "v": 1}]', URL), pd.Series)
+    df = parse(b'[{"t": 86400, "o": {"a": 1}}]', URL, dtype="float32")
+    assert df["a"].dtype == "float32"
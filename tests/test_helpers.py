@@ -0,0 +1,107 @@
+import pytest
+
+from leavenworth import helpers
+from leavenworth.helpers import typeassert
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+@typeassert(symbols=(str, list), interval=str, period=str, params=dict)
+def _call(symbols, interval="daily", period=None, params=None):
+    return symbols, interval, period, params
+
+
+def test_typeassert_accepts_valid_arguments():
+    assert _call("A", "1min") == ("A", "1min", None, None)
+    assert _call(["A"], interval="daily", period="1y", params={})[0] == ["A"]
+
+
+def test_typeassert_accepts_explicit_none_defaults():
+    assert _call("A", period=None, params=None) == ("A", "daily", None, None)
+    assert _call("A", "daily", None, None) == ("A", "daily", None, None)
+
+
+@pytest.mark.parametrize(
+    "args, kwargs",
+    [((1,), {}), (("A", 5), {}), (("A",), {"interval": None}), (("A",), {"period": 3})],
+)
+def test_typeassert_rejects_wrong_types(args, kwargs):
+    with pytest.raises(TypeError):
+        _call(*args, **kwargs)
+
+
+def test_typeassert_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(helpers, "typecheck", False)
+    assert _call(1) == (1, "daily", None, None)
+
+
+def test_metric_registry_is_loaded_once_and_read_only():
+    registry = helpers.metric_registry()
+    assert registry is helpers.metric_registry()
+    assert registry["MVRV"].url.endswith("/market/mvrv")
+    assert registry["ETH_STAKED"].assets == ("ETH",)
+    with pytest.raises(TypeError):
+        registry["MVRV"] = None
+    with pytest.raises(Exception, match="Unknown parameter"):
+        helpers.metric_info("NOT_A_METRIC")
+
+
+def test_to_epoch_is_utc():
+    from leavenworth.glassnode_api import GlassnodeClient, to_epoch
+
+    assert to_epoch("2023-01-01") == 1672531200
+    assert to_epoch("2023-01-01T02:00:00+02:00") == 1672531200
+    assert to_epoch("1672531200") == to_epoch(1672531200) == 1672531200
+    p = GlassnodeClient().params(i="1h", s="2023-01-01", u="2023-01-02")
+    assert (p["i"], p["s"], p["u"]) == ("1h", 1672531200, 1672617600)
+
+
+class _FakeClient:
+    """Serves hourly bars of a fixed history between s and u"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, a="BTC", i="24h", s=None, u=None, debug=False, dtype="float64"):
+        import pandas as pd
+        from leavenworth.glassnode_api import to_epoch
+
+        self.calls.append((s, u))
+        index = pd.date_range("2023-01-01", "2023-01-10", freq="h")
+        data = pd.Series(range(len(index)), index=index, name="market_price_usd_close", dtype=float)
+        start = None if s is None else pd.to_datetime(to_epoch(s), unit="s")
+        end = None if u is None else pd.to_datetime(to_epoch(u), unit="s")
+        return data.loc[start:end]
+
+
+def test_cached_get_fetches_only_missing_ranges(monkeypatch, tmp_path):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    client = _FakeClient()
+    monkeypatch.setattr(helpers, "glassnode_client", lambda: client)
+    url = "https://api.glassnode.com/v1/metrics/market/price_usd_close"
+    first = helpers._cached_get("PRICE", url, i="1h", since="2023-01-05")
+    assert first.index[0].isoformat() == "2023-01-05T00:00:00"
+    second = helpers._cached_get("PRICE", url, i="1h", since="2023-01-03", until="2023-01-04")
+    assert client.calls[1] == ("2023-01-03", 1672876800)
+    assert (second.index[0].day, second.index[-1].day) == (3, 4)
+    # The cache only covers 2023-01-03 onwards, a full history request fetches the missing head once
+    full = helpers._cached_get("PRICE", url, i="1h")
+    assert client.calls[3] == (None, 1672704000)
+    assert full.index[0].isoformat() == "2023-01-01T00:00:00"
+    helpers._cached_get("PRICE", url, i="1h")
+    assert len(client.calls) == 6 and client.calls[5][1] is None
+
+
+def test_write_cache_is_safe_across_threads(monkeypatch, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    import pandas as pd
+    from leavenworth.cache import read_cache, write_cache
+
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    frames = [pd.DataFrame({"v": [float(n)] * 1000}) for n in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda df: write_cache("k", df), frames))
+    assert read_cache("k").v.nunique() == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["k.parquet"]
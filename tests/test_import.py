@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+# Wall clock budget (seconds) for importing the coinalyze client in a fresh interpreter
+IMPORT_BUDGET = 1.5
+HEAVY_MODULES = ["matplotlib", "seaborn", "jupyterthemes", "yfinance", "fredapi", "janitor"]
+
+SCRIPT = """
+import json, sys, time
+t = time.perf_counter()
+import leavenworth
+from leavenworth import coinalyze
+elapsed = time.perf_counter() - t
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def _run(script):
+    env = {k: v for k, v in os.environ.items() if k != "lc_secrets"}
+    out = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout)
+
+
+def test_import_is_lazy_and_needs_no_secrets():
+    """Importing the package must not load the plotting stack or read api.json"""
+    result = _run(SCRIPT)
+    loaded = [m for m in HEAVY_MODULES if m in result["modules"]]
+    assert loaded == []
+    assert result["elapsed"] < IMPORT_BUDGET
+
+
+def test_lazy_attribute_access():
+    result = _run(
+        "import json, sys, leavenworth; leavenworth.glassnode_params; "
+        "print(json.dumps({'modules': sorted(sys.modules)}))"
+    )
+    assert "leavenworth.glassnode" in result["modules"]
+    assert "matplotlib" not in result["modules"]
+
+
+def test_functions_named_like_their_module_stay_functions():
+    """glassnode, yahoo and fng resolve to the functions whichever name of their module loads first"""
+    result = _run(
+        "import inspect, json, sys, leavenworth as lw\n"
+        "lw.glassnode_params()\n"
+        "first = lw.glassnode\n"
+        "try:\n"
+        "    lw.glassnode('NOT_A_METRIC')\n"
+        "except Exception as e:\n"
+        "    error = str(e)\n"
+        "from leavenworth import derive, glassnode\n"
+        "import leavenworth.fng\n"
+        "from leavenworth import fng\n"
+        "module = sys.modules['leavenworth.glassnode']\n"
+        "print(json.dumps({\n"
+        "    'functions': [first is module.glassnode, glassnode is module.glassnode, fng is sys.modules['leavenworth.fng'].fng],\n"
+        "    'doc': lw.glassnode.__doc__ == module.glassnode.__doc__,\n"
+        "    'signature': list(inspect.signature(lw.glassnode).parameters)[:2],\n"
+        "    'error': error,\n"
+        "}))"
+    )
+    assert result["functions"] == [True, True, True]
+    assert result["doc"]
+    assert result["signature"] == ["metric", "currency"]
+    assert "Unknown parameter" in result["error"]
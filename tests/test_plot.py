@@ -0,0 +1,67 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from leavenworth import plot
+from leavenworth.plot import decimate_series
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+def test_decimate_keeps_extrema_and_end_points():
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2015-01-01", periods=100_003, freq="h")
+    s = pd.Series(np.cumsum(rng.normal(size=len(index))), index=index)
+    s.iloc[5000:5100] = np.nan
+    d = decimate_series(s, 500)
+    assert len(d) <= 2 * 500 + 2
+    assert d.index.is_monotonic_increasing
+    assert d.max() == s.max() and d.min() == s.min()
+    assert d.index[0] == s.index[0] and d.index[-1] == s.index[-1]
+
+
+def test_decimate_leaves_short_series_alone():
+    s = pd.Series(np.arange(10.0))
+    assert decimate_series(s, 500) is s
+
+
+def test_decimate_frame_keeps_extrema_of_every_column():
+    rng = np.random.default_rng(2)
+    index = pd.date_range("2015-01-01", periods=50_000, freq="h")
+    df = pd.DataFrame(np.cumsum(rng.normal(size=(len(index), 3)), axis=0), index=index)
+    d = decimate_series(df, 200)
+    assert len(d) <= 3 * 2 * 200 + 2
+    assert (d.max() == df.max()).all() and (d.min() == df.min()).all()
+
+
+def _jobs(n):
+    index = pd.date_range("2020-01-01", periods=500, freq="D")
+    rng = np.random.default_rng(3)
+    jobs = []
+    for k in range(n):
+        s = pd.Series(np.cumsum(rng.normal(size=len(index))), index=index, name="v")
+        kwargs = dict(dual_plot=False, title=f"CHART {k}")
+        jobs.append(dict(plot="glassnode_plot", filename=f"chart_{k}.png", args=(s,), kwargs=kwargs))
+    return jobs
+
+
+def test_render_batch_in_process_restores_backend(tmp_path):
+    plt.switch_backend("svg")
+    try:
+        paths = plot.render_batch(_jobs(3), out_dir=tmp_path / "one", processes=1, dpi=40)
+        assert plt.get_backend() == "svg"
+    finally:
+        plt.switch_backend("agg")
+    assert all((tmp_path / "one" / f"chart_{k}.png").stat().st_size > 0 for k in range(3))
+    assert len(paths) == 3
+    assert plt.get_fignums() == []
+    assert plot._batch is False and plot._figure is None
+
+
+def test_render_batch_on_a_process_pool(tmp_path):
+    paths = plot.render_batch(_jobs(4), out_dir=tmp_path, processes=2, dpi=40)
+    assert sorted(paths) == sorted(str(tmp_path / f"chart_{k}.png") for k in range(4))
+    assert all((tmp_path / f"chart_{k}.png").stat().st_size > 0 for k in range(4))
+    assert plt.get_fignums() == []
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from leavenworth.returns import period_returns, price_ratio, rolling_stat
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2020-01-01", periods=800, freq="D", name="DATE")
+    data = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(800, 5)), axis=0))
+    df = pd.DataFrame(data, index=index, columns=list("ABCDE"))
+    df.iloc[:30, 1] = np.nan
+    df.iloc[400, 2] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("method", ["mean", "std"])
+@pytest.mark.parametrize("log", [False, True])
+def test_rolling_matches_pandas(prices, method, log):
+    ratio = prices / prices.shift(1)
+    if log:
+        ratio = np.log(ratio)
+    expected = getattr(ratio.rolling(60), method)()
+    result = rolling_stat(price_ratio(prices, log=log), 60, method=method)
+    np.testing.assert_allclose(result, expected.to_numpy(), rtol=1e-7, atol=1e-10)
+
+
+@pytest.mark.parametrize("period", ["day", "month", "quarter", "year", "inception"])
+def test_period_returns_match_pandas(prices, period):
+    rules = {"month": "ME", "quarter": "QE", "year": "YE"}
+    if period in rules:
+        expected = prices.resample(rules[period]).last().pct_change(fill_method=None)
+    elif period == "day":
+        expected = prices.pct_change(fill_method=None)
+    else:
+        expected = (prices.pct_change(fill_method=None) + 1).cumprod() - 1
+    pd.testing.assert_frame_equal(period_returns(prices, period), expected.round(4))
+
+
+@pytest.mark.parametrize("method", ["mean", "std"])
+def test_rolling_recovers_after_infinite_values(method):
+    a = np.array([1.0, 2.0, 0.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+    ratio = price_ratio(a[:, None], log=True)[:, 0]
+    expected = getattr(pd.Series(ratio).rolling(3), method)()
+    result = rolling_stat(ratio, 3, method=method)
+    assert np.isfinite(result[-1])
+    np.testing.assert_allclose(result, expected.to_numpy(), rtol=1e-7)
+
+
+@pytest.mark.parametrize("top", [1e5, 1e8])
+def test_rolling_std_is_accurate_on_trending_series(top):
+    a = np.geomspace(top, 1.0, 500)
+    expected = pd.Series(a).rolling(20).std().to_numpy()
+    result = rolling_stat(a, 20, method="std")
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
+    # daily_returns scales the result in place
+    assert result.flags.writeable
@@ -0,0 +1,54 @@
+import pytest
+
+from leavenworth import transport
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings(monkeypatch):
+    monkeypatch.setattr(transport, "settings", dict(transport.settings))
+    monkeypatch.setattr(transport, "_session", None)
+
+
+def test_session_adapter_settings():
+    s = transport._build_session()
+    for prefix in ["https://", "http://"]:
+        adapter = s.get_adapter(prefix + "example.com")
+        retry = adapter.max_retries
+        assert retry.total == transport.settings["retries"]
+        assert retry.backoff_factor == transport.settings["backoff_factor"]
+        assert set(retry.status_forcelist) == {429, 500, 502, 503, 504}
+        assert retry.respect_retry_after_header
+        assert not retry.raise_on_status
+        assert set(retry.allowed_methods) == {"GET"}
+        assert adapter._pool_connections == transport.settings["pool_connections"]
+        assert adapter._pool_maxsize == transport.settings["pool_maxsize"]
+    assert "gzip" in s.headers["Accept-Encoding"]
+
+
+def test_configure_rebuilds_the_shared_session():
+    first = transport.session()
+    assert transport.session() is first
+    transport.configure(retries=2, pool_maxsize=4)
+    second = transport.session()
+    assert second is not first
+    assert second.get_adapter("https://example.com").max_retries.total == 2
+    with pytest.raises(Exception, match="Unknown transport settings"):
+        transport.configure(retry=3)
+
+
+def test_get_uses_the_default_timeout(monkeypatch):
+    calls = []
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            calls.append(kwargs)
+
+    monkeypatch.setattr(transport, "_session", FakeSession())
+    transport.get("https://example.com", params={"a": 1})
+    transport.get("https://example.com", timeout=3)
+    assert calls[0]["timeout"] == (5, 60) and calls[0]["params"] == {"a": 1}
+    assert calls[1]["timeout"] == 3
@@ -0,0 +1,88 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+# leavenworth.yahoo is also the name of the lazily exported function
+yahoo_module = importlib.import_module("leavenworth.yahoo")
+
+__author__ = "Ranjan Grover"
+__copyright__ = "Ranjan Grover"
+__license__ = "MIT"
+
+
+class _FakeTicker:
+    """Stand-in for yf.Ticker serving three years of tz-aware business day bars up to today"""
+
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period=None, start=None):
+        _FakeTicker.calls.append((self.ticker, period, start))
+        today = pd.Timestamp.now().normalize()
+        index = pd.bdate_range(today - pd.DateOffset(years=3), today, name="Date").tz_localize("America/New_York")
+        price = 100.0 + np.arange(len(index)) + 1000 * (ord(self.ticker[0]) - ord("A"))
+        h = pd.DataFrame(
+            {"Open": price, "High": price, "Low": price, "Close": price, "Volume": 1, "Dividends": 0.0, "Stock Splits": 0.0},
+            index=index,
+        )
+        if start is not None:
+            return h[h.index >= pd.Timestamp(start).tz_localize(index.tz)]
+        return yahoo_module._since(h, yahoo_module._period_start(period))
+
+
+def test_yahoo_store_pulls_only_missing_data(monkeypatch, tmp_path):
+    monkeypatch.setenv("lc_cache", str(tmp_path))
+    monkeypatch.setattr(yahoo_module.yf, "Ticker", _FakeTicker)
+    calls = _FakeTicker.calls = []
+    first = yahoo_module.yahoo_store(["A", "B"], period="1y")
+    assert sorted(calls) == [("A", "1y", None), ("B", "1y", None)]
+    assert list(first.columns) == ["A", "B"]
+
+    # Covered by the store: only the tail from the last stored bar is pulled
+    calls.clear()
+    again = yahoo_module.yahoo_store(["A", "B"], period="1y")
+    last = first.index[-1].strftime("%Y-%m-%d")
+    assert sorted(calls) == [("A", None, last), ("B", None, last)]
+    pd.testing.assert_frame_equal(again, first)
+
+    # A shorter period is cut from the store
+    calls.clear()
+    short = yahoo_module.yahoo_store("A", period="6mo")
+    assert [c[1] for c in calls] == [None]
+    assert short.index[0] >= yahoo_module._period_start("6mo").tz_localize(short.index.tz)
+
+    # A longer period than the store covers pulls the full history again
+    calls.clear()
+    longer = yahoo_module.yahoo_store(["A"], period="2y")
+    assert calls == [("A", "2y", None)]
+    assert len(longer) > len(first)
+    index = yahoo_module.read_cache("yahoo_index")
+    assert list(index.columns) == ["START"]
+    assert index.loc["A", "START"] == yahoo_module._period_start("2y")
+
+
+def test_yahoo_downloads_concurrently_in_ticker_order(monkeypatch):
+    import time
+
+    class SlowFirst(_FakeTicker):
+        def history(self, period=None, start=None):
+            # The first ticker finishes last
+            time.sleep(0.3 if self.ticker == "C" else 0.15)
+            return super().history(period=period, start=start)
+
+    monkeypatch.setattr(yahoo_module.yf, "Ticker", SlowFirst)
+    _FakeTicker.calls = []
+    single = yahoo_module.yahoo("A", period="1mo")
+    assert list(single.columns) == ["A"]
+    t = time.perf_counter()
+    long = yahoo_module.yahoo(["C", "A", "B"], period="1y", pivot=False, max_workers=3)
+    # Serially this takes 0.6s
+    assert time.perf_counter() - t < 0.5
+    assert list(dict.fromkeys(long.TICKER)) == ["C", "A", "B"]
+    wide = yahoo_module.yahoo(["C", "A", "B"], period="1y")
+    assert list(wide.columns) == ["A", "B", "C"]
+    assert wide.shape == (long.DATE.nunique(), 3)
+    assert not wide.isna().any().any()